@@ -1,25 +1,24 @@
 # MFA_imap_Mail.py
 #   Uses IMAP Push to watch for email arrival and parse MFA PINs.
-#   Updated with automatic color aging and expiry inside Idler.idle().
+#   Color aging and expiry are handled by notification_store.NotificationStore.
 
 import imaplib2
 import time
 from threading import *
-import email
 import configparser
 import ssl
 import socket
 import os
-from html.parser import HTMLParser
-import re
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
 
-import pytz
+import mfa_code
+from notification_store import IMAP_COLORS, Notification, NotificationStore
 
 # Configurable delay and max timeout between reconnection attempts
 RETRY_DELAY_SECONDS = 30
 MAX_RETRIES = 20
+# attempts at one message before it is skipped
+MESSAGE_ATTEMPTS = 3
 
 # number of notifications shown
 STACK_SIZE = 5
@@ -28,65 +27,9 @@ CODE_DURATION = 5
 
 
 # ============================================================
-# HTML Strip Utility
+# Notification Store (ages colors and expires codes on its own timer)
 # ============================================================
-class StripHTML(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.result = []
-
-    def handle_data(self, data):
-        self.result.append(data)
-
-    def get_text(self):
-        return ''.join(self.result)
-
-
-def strip_html(text):
-    remover = StripHTML()
-    remover.feed(text)
-    return remover.get_text()
-
-
-# ============================================================
-# Notification Object
-# ============================================================
-class Notification:
-    id: str
-    time: datetime
-    code: int
-    body: str
-    color: str
-
-    def __init__(self, id_=None, time_=None, code_=None, body_=None, color_="green"):
-        self.id = id_
-        self.time = time_
-        self.code = code_
-        self.body = body_
-        self.color = color_
-
-
-# ============================================================
-# FixedStack for Notifications
-# ============================================================
-class FixedStack:
-    stack: List[Notification]
-
-    def __init__(self, stack):
-        self.stack = []
-
-    def push(self, data: Notification):
-        self.stack.append(data)
-        if len(self.stack) > STACK_SIZE:
-            self.stack.reverse()
-            self.stack.pop()
-            self.stack.reverse()
-
-    def remove(self, notification):
-        return self.stack.remove(notification)
-
-
-notificationStack = FixedStack([])
+store = NotificationStore(max_size=STACK_SIZE, colors=IMAP_COLORS, lifetime=CODE_DURATION * 60)
 
 
 # ============================================================
@@ -97,6 +40,8 @@ class Idler(object):
         self.thread = Thread(target=self.idle)
         self.M = conn
         self.event = Event()
+        self.uidvalidity = None
+        self.last_uid = None  # highest UID already handled
 
     def start(self):
         self.thread.start()
@@ -136,37 +81,6 @@ class Idler(object):
             if self.needsync:
                 self.dosync_wrapper()
 
-            # ====================================================
-            # AGE NOTIFICATIONS & EXPIRE OLD ONES
-            # Always runs, even without new emails
-            # ====================================================
-            now = datetime.now(pytz.timezone("US/Central"))
-            to_remove = []
-
-            for note in notificationStack.stack:
-                mins_old = (now - note.time).total_seconds() / 60
-
-                # Expire codes
-                if mins_old >= CODE_DURATION:
-                    to_remove.append(note)
-                    continue
-
-                # Color fractions
-                fraction = mins_old / CODE_DURATION
-                if fraction < 1/3:
-                    note.color = "green"
-                elif fraction < 2/3:
-                    note.color = "yellow"
-                else:
-                    note.color = "blue"
-
-            # Remove expired notifications
-            for note in to_remove:
-                try:
-                    notificationStack.remove(note)
-                except:
-                    pass
-
     # ============================================================
     # Sync wrapper (handles disconnect)
     # ============================================================
@@ -187,70 +101,110 @@ class Idler(object):
                     print("Secondary error during sync:", e)
             except Exception as e:
                 print("Failed to reconnect:", e)
+        except Exception as e:
+            # Anything else is logged and the next wake syncs again; the Idler thread must not die
+            print("Error during sync:", e)
 
     # ============================================================
-    # Primary email fetch/parser
+    # Incremental UID sync
     # ============================================================
     def dosync2(self):
+        """
+        Fetch only messages with UIDs above the last one processed, oldest first,
+        so several codes arriving in one wake are all picked up.
+        """
         time.sleep(.2)
-        resp_code, mails = M.search(None, 'FROM', '"Bambu Lab"')
-
-        if len(mails[0]) > 0:
-            dat = mails[0].decode().split()[-800:]
-            mail_id = dat[-1]
+        uidvalidity = self.selected_uidvalidity()
+
+        if self.last_uid is None or (uidvalidity is not None and uidvalidity != self.uidvalidity):
+            # First sync, or the server renumbered the mailbox: start over from recent mail only
+            if self.uidvalidity is not None:
+                print(f"UIDVALIDITY changed ({self.uidvalidity} -> {uidvalidity}); resyncing")
+            self.uidvalidity = uidvalidity
+            self.last_uid = 0
+            # Read before the search, so anything that arrives in between is still above it
+            uidnext = self.selected_uidnext()
+            since = (datetime.now() - timedelta(days=1)).strftime("%d-%b-%Y")
+            criteria = ('SINCE', since, 'FROM', '"Bambu Lab"')
+        else:
+            uidnext = None
+            # Always searched rather than gated on STATUS, which may be stale for the selected mailbox
+            criteria = ('UID', f'{self.last_uid + 1}:*', 'FROM', '"Bambu Lab"')
+
+        resp_code, data = self.M.uid('SEARCH', None, *criteria)
+        # "N:*" always matches the highest UID, even when it is below N
+        uids = sorted(u for u in map(int, (data[0] or b"").split()) if u > self.last_uid)
+
+        for uid in uids:
+            self.process(uid)
+            self.last_uid = uid
+
+        if uidnext is not None:
+            # Everything below UIDNEXT was covered by the SINCE search, so later syncs never reach back past it
+            self.last_uid = max(self.last_uid, uidnext - 1)
+
+    def selected_uidvalidity(self):
+        """UIDVALIDITY from the last SELECT's untagged response, or None if it was already consumed."""
+        typ, data = self.M.response('UIDVALIDITY')
+        try:
+            return int(data[-1])
+        except (TypeError, ValueError, IndexError):
+            return None
 
+    def selected_uidnext(self):
+        """UIDNEXT from the last SELECT's untagged response, else from STATUS; None if neither has it."""
+        typ, data = self.M.response('UIDNEXT')
+        try:
+            return int(data[-1])
+        except (TypeError, ValueError, IndexError):
+            pass
+        try:
+            typ, data = self.M.status(source_folder, '(UIDNEXT)')
+        except imaplib2.IMAP4.error as e:
+            # Some servers refuse STATUS on the selected mailbox; the next sync then searches from 1
+            print("STATUS UIDNEXT failed:", e)
+            return None
+        # e.g. [b'INBOX (UIDNEXT 4392)']
+        items = (data[-1] or b"").decode().replace("(", " ").replace(")", " ").split() if data else []
+        for name, value in zip(items, items[1:]):
+            if name.upper() == "UIDNEXT" and value.isdigit():
+                return int(value)
+        return None
+
+    def process(self, uid):
+        """
+        Fetch one message and raise a notification for its code. Connection errors go to the
+        wrapper; anything else is retried a few times, then the message is skipped.
+        """
+        for attempt in range(1, MESSAGE_ATTEMPTS + 1):
             try:
-                resp_code, mail_data = M.fetch(mail_id, '(RFC822)')
-                message = email.message_from_bytes(mail_data[0][1]).as_string()
-                message = " ".join(strip_html(message).split())
-            except:
-                time.sleep(1)
-                return self.dosync2()
+                self.notify(str(uid), mfa_code.fetch_code(self.M, uid))
+                return
+            except (imaplib2.IMAP4.abort, imaplib2.IMAP4.error, socket.error):
+                raise
+            except Exception as e:
+                print(f"Error handling message {uid} (attempt {attempt}): {e}")
+                if attempt < MESSAGE_ATTEMPTS:
+                    time.sleep(1)
+        print(f"Skipping message {uid}")
 
-            try:
-                body = re.search('Welcome to Bambu Lab([\\s\\S]*)Bambu Lab', message).group()
-                codeStr = re.search("Your verification code is:\\s+\\d\\d\\d\\d\\d\\d", message).group()
-                code = re.search("\\d\\d\\d\\d\\d\\d", codeStr).group()
-
-                dateStr = re.search(
-                    "Delivery-date: [A-Za-z]{3}, \\d{2} [A-Za-z]{3} \\d{4} \\d{2}:\\d{2}:\\d{2} -\\d{4}",
-                    message
-                ).group()
-
-                date = re.search(
-                    "\\d{2} [A-Za-z]{3} \\d{4} \\d{2}:\\d{2}:\\d{2} -\\d{4}",
-                    dateStr
-                ).group()
-
-                t = time.strptime(date, "%d %b %Y %H:%M:%S %z")
-                localized_time = datetime(*t[:6], tzinfo=pytz.FixedOffset(t.tm_gmtoff // 60))
-
-                mins_old = (
-                    datetime.now(pytz.timezone("US/Central")) - localized_time
-                ).total_seconds() / 60
-
-                if mins_old < CODE_DURATION:
-                    # Assign initial color
-                    fraction = mins_old / CODE_DURATION
-                    if fraction < 1/3:
-                        color = "green"
-                    elif fraction < 2/3:
-                        color = "yellow"
-                    else:
-                        color = "blue"
-
-                    notificationStack.push(
-                        Notification(
-                            id_=mail_id,
-                            time_=localized_time,
-                            code_=code,
-                            body_=body,
-                            color_=color
-                        )
-                    )
-
-            except:
-                pass
+    # ============================================================
+    # Notification from an extracted code
+    # ============================================================
+    def notify(self, mail_id, found):
+        if found is None:
+            return  # not a verification email
+
+        # The store drops codes that are already past CODE_DURATION and picks the starting color
+        store.push(
+            Notification(
+                id=mail_id,
+                time=found.time,
+                code=found.code,
+                body=found.body,
+                expires_at=found.time + timedelta(minutes=CODE_DURATION),
+            )
+        )
 
 
 # ============================================================
@@ -278,12 +232,12 @@ def connect_imap():
 # Notification Pump for UI Process
 # ============================================================
 def pump_notifications(out_q):
-    while True:
-        try:
-            out_q.put(list(notificationStack.stack))
-        except Exception as e:
-            print("Pump error:", e)
-        time.sleep(0.5)
+    """
+    Forward store changes to the UI process as they happen: one snapshot, then only diffs.
+    Nothing is sent while no mail arrives and no code changes color or expires.
+    """
+    store.subscribe(out_q.put, initial=True)
+    Event().wait()  # keep this process's main thread alive; the store's timer does the work
 
 
 # ============================================================
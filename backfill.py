@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Backfill the whole Printing History into Sheets, newest to oldest, in one streaming pass.
+Progress is checkpointed after every append, so an interrupted run resumes where it stopped.
+Runs alongside the live monitor: the app's UI is shared in bounded time slices and
+Sheets writes go out at background priority.
+
+    python backfill.py [--no-details] [--reset]
+"""
+import argparse
+import json
+import os
+import time
+import controller as cntrl
+import gspread_updater as gu
+import parser as pr
+import rate_limit as rl
+from bambu_monitor import get_job_details, job_from_screen_entry
+from gspread_updater import SheetClient
+from job_store import PrintJob
+from usage_stats import UsageStats
+
+CHECKPOINT_PATH = "backfill_checkpoint.json"
+APPEND_BATCH = 100   # rows per append to Sheets
+UI_SLICE = 120       # seconds of UI time per slice before yielding to the monitor
+SLICE_PAUSE = 45     # seconds between slices; longer than the monitor's idle sleep
+MIN_WALK = 30        # seconds of new rows a slice always gets after seeking back down
+SEEK_MARGIN = 2      # screens short of the saved depth to land before stepping forward
+
+
+def load_checkpoint() -> dict:
+    if not os.path.exists(CHECKPOINT_PATH):
+        return {"last": None, "keys": [], "count": 0, "done": False, "depth": 0}
+    with open(CHECKPOINT_PATH) as f:
+        return json.load(f)
+
+
+def save_checkpoint(checkpoint: dict):
+    tmp = CHECKPOINT_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, CHECKPOINT_PATH)
+
+
+class Backfill:
+    def __init__(self, details: bool = True):
+        self.details = details
+        self.checkpoint = load_checkpoint()
+        self.sheet_client = SheetClient("Raw Data", priority=rl.PRIORITY_BACKGROUND, hot_days=gu.HOT_RETENTION_DAYS)
+        self.usage = UsageStats()
+        self.pending = []  # jobs collected since the last append
+        self.depth = 0     # swipes from the top of the history to the current screen
+
+    def run(self):
+        if self.checkpoint["done"]:
+            print("[Backfill] Already complete; use --reset to start over")
+            return
+
+        finished = False
+        while not finished:
+            with cntrl.ui_lock():
+                finished = self._slice(time.monotonic() + UI_SLICE)
+            self._append()
+            # Where to land next slice, in swipes from the top of the history
+            self.checkpoint["depth"] = self.depth
+            save_checkpoint(self.checkpoint)
+            if not finished:
+                print(f"[Backfill] {self.checkpoint['count']} jobs so far; yielding the UI for {SLICE_PAUSE}s")
+                time.sleep(SLICE_PAUSE)
+
+        self.checkpoint["done"] = True
+        save_checkpoint(self.checkpoint)
+        print(f"[Backfill] Complete: {self.checkpoint['count']} jobs")
+
+    def _slice(self, until: float) -> bool:
+        """
+        Walk down the history until the time slice runs out. Returns True at the end of the list.
+        The seek back down counts against the slice, but the walk always gets at least MIN_WALK.
+        """
+        screen = self._seek(until)
+        until = max(until, time.monotonic() + MIN_WALK)
+        while time.monotonic() < until:
+            self._collect(screen)
+            if len(self.pending) >= APPEND_BATCH:
+                self._append()
+
+            cntrl.scroll_down(screen)
+            self.depth += 1
+            next_screen = pr.parse_screen()
+            if next_screen.keys() == screen.keys():
+                return True
+            screen = next_screen
+        return False
+
+    def _seek(self, until: float) -> dict:
+        """
+        Open Printing History and, when resuming, get back to the last job written.
+        The monitor resets the list to the top between slices, so this replays the saved depth
+        as blind swipes (no screen dumps) and then steps screen by screen to the job.
+        """
+        cntrl.go_to_printing_history()
+        screen = pr.parse_screen()
+        self.depth = 0
+        last = self._last_written()
+        if last is None:
+            return screen
+
+        print(f"[Backfill] Resuming after {last.name} ({last.date})")
+        layout = screen
+        for _ in range(max(self.checkpoint.get("depth", 0) - SEEK_MARGIN, 0)):
+            cntrl.scroll_down(layout)
+            self.depth += 1
+        screen = pr.parse_screen()
+
+        # Stopping early is safe: jobs newer than the checkpoint are skipped by _collect
+        while time.monotonic() < until:
+            dates = [d for d in map(_entry_date, screen) if d is not None]
+            if dates and max(dates) < last.date and self.depth > 0:
+                cntrl.scroll_up(screen)  # overshot
+                self.depth -= 1
+            elif dates and min(dates) <= last.date:
+                break
+            else:
+                cntrl.scroll_down(screen)
+                self.depth += 1
+            next_screen = pr.parse_screen()
+            if next_screen.keys() == screen.keys():
+                break
+            screen = next_screen
+        return screen
+
+    def _collect(self, screen: dict):
+        """Queue every job on screen that is older than the checkpoint, fetching details page by page."""
+        last = self._last_written()
+        queued = {(j.name, j.date) for j in self.pending}
+        for entry, bounds in screen.items():
+            try:
+                job = job_from_screen_entry(entry)
+            except Exception:
+                continue
+            key = (job.name, job.date)
+            if key in queued or json.dumps([job.name, job.date.isoformat()]) in self.checkpoint["keys"]:
+                continue
+            if last is not None and job.date > last.date:
+                continue
+            if self.details:
+                get_job_details(bounds, job)
+            self.pending.append(job)
+            queued.add(key)
+
+    def _append(self):
+        """Stream the pending jobs to Sheets as one append, then checkpoint past them."""
+        if not self.pending:
+            return
+        # The monitor writes (and at startup rolls over) the same sheet from another process,
+        # so recheck the row index before every batch rather than every few minutes
+        self.sheet_client._validated_at = 0.0
+        with self.sheet_client.batch():
+            for job in self.pending:
+                self.sheet_client.update_job(job)
+        self.usage.record_all(self.pending)
+
+        oldest = min(self.pending, key=lambda j: j.date)
+        self.checkpoint["last"] = oldest.to_dict()
+        # Keys sharing the oldest timestamp, so a resume doesn't redo them
+        self.checkpoint["keys"] = [
+            json.dumps([j.name, j.date.isoformat()]) for j in self.pending if j.date == oldest.date
+        ]
+        self.checkpoint["count"] += len(self.pending)
+        save_checkpoint(self.checkpoint)
+        print(f"[Backfill] Appended {len(self.pending)} jobs, back to {oldest.date:%Y-%m-%d %H:%M}")
+        self.pending = []
+
+    def _last_written(self):
+        last = self.checkpoint["last"]
+        return PrintJob.from_dict(last) if last else None
+
+
+def _entry_date(entry):
+    try:
+        return job_from_screen_entry(entry).date
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-details", action="store_true", help="skip tapping into each job for weight/materials")
+    parser.add_argument("--reset", action="store_true", help="discard the checkpoint and start from the newest job")
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+
+    # This process gets its own small share of the Sheets quota, leaving the rest to the monitor and kiosk
+    rl.configure("backfill")
+    Backfill(details=not args.no_details).run()
+
+
+if __name__ == "__main__":
+    main()
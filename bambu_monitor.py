@@ -1,43 +1,75 @@
 import datetime
-import os
 import re
-import subprocess
 import time
 import controller as cntrl
+import deadline as dl
 import parser as pr
 import job_store as js
+import metrics
+import rate_limit as rl
+import recovery as rc
+from error_capture import ErrorCapture
+import gspread_updater as gu
 from gspread_updater import SheetClient
+from sheet_spool import SheetSpool
+from status_channel import StatusPublisher
+from usage_stats import UsageStats
+
+error_capture = None
+
+# Seconds each monitor cycle may take; ADB and Sheets calls inherit their timeouts from it
+CYCLE_BUDGET = 300
+# Low-priority phases are skipped once less than this is left, so the status board still gets updated
+ENRICH_RESERVE = 120
+ERROR_CHECK_RESERVE = 120
 
 def main():
     # Initialize
+    rl.configure("monitor")
     store = js.JobStore()
-    sheet_client = SheetClient("Raw Data")
-    mfa_display_sheet = SheetClient("device_status")
-    store.add_job(get_init_job(sheet_client))  
+    recovery = rc.RecoveryEngine()
+    sheet_client = SheetClient("Raw Data", hot_days=gu.HOT_RETENTION_DAYS)
+    mfa_display_sheet = SheetClient("device_status", priority=rl.PRIORITY_DISPLAY)
+    # Seed the display's row hashes; the Raw Data index loads lazily on the spool worker's first drain
+    gu.prime(mfa_display_sheet)
+    # Roll old finished jobs into monthly archives before the spool worker starts writing rows
+    sheet_client.rollover()
+    spool = SheetSpool(sheet_client)
+    usage = UsageStats()
+    usage_sheet = SheetClient("Usage Summary", priority=rl.PRIORITY_BACKGROUND, create=True)
+    status_publisher = StatusPublisher()
+    metrics.start_exporter()
+    store.add_job(get_init_job(sheet_client, spool))
 
     while True:
         try:
-            # wait for app to become responsive
-            wait = 0
-            while cntrl.tap_by_desc("Wait", whole_match=False):
-                time.sleep(5)
-                wait += 1
-                if wait > 10:
-                    subprocess.run(["sudo", "reboot"])
-
-            os.system("adb pull /sdcard/view.xml test.xml")
-            # Check for new jobs since last run
-            print("Checking for new jobs...")
-            cntrl.go_to_printing_history()
-            scroll_to_job(store.get_latest_job())
-            check_for_later_jobs(store, sheet_client)
-
-            # Update in-progress jobs in memory
-            print("Updating in-progress jobs...")
-            update_in_progress_jobs(store, sheet_client)
-
-            # Update MFA display
-            get_machine_statuses(mfa_display_sheet)
+            # Hold the app's UI for the whole cycle so a running backfill can't interleave taps
+            with cntrl.ui_lock():
+                # wait for app to become responsive, escalating recovery if it stays stuck
+                if not rc.wait_for_app():
+                    recovery.recover(start_tier=1)
+
+                with dl.cycle(CYCLE_BUDGET):
+                    dl.run(["adb", "pull", "/sdcard/view.xml", "test.xml"])
+                    # Check for new jobs since last run
+                    print("Checking for new jobs...")
+                    cntrl.go_to_printing_history()
+                    scroll_to_job(store.get_latest_job())
+                    check_for_later_jobs(store, spool)
+
+                    # Update in-progress jobs in memory
+                    print("Updating in-progress jobs...")
+                    update_in_progress_jobs(store, spool)
+
+                    # Job rows spooled this cycle are drained to Sheets as one batch in the background
+                    spool.flush()
+
+                    # Fold newly finished jobs into the usage aggregates
+                    if usage.record_all(store.get_jobs()):
+                        publish_usage(usage, usage_sheet)
+
+                    # Update MFA display
+                    get_machine_statuses(mfa_display_sheet, status_publisher)
 
             # Purge very old jobs from in-memory store
             if len(store) > 100:
@@ -48,9 +80,14 @@ def main():
             time.sleep(30)
 
         except Exception as e:
+            if isinstance(e, dl.DeadlineExceeded):
+                print(f"[Deadline] Cycle overran its {CYCLE_BUDGET}s budget: {e}")
             print(f"Error occurred: {e}. Restarting loop...")
-            log_error(e)
-            cntrl.go_to_printing_history()
+            with cntrl.ui_lock():
+                # Capture the screen as the error left it, before recovery navigates away
+                log_error(e)
+                recovery.recover()
+            print(f"[Recovery] {recovery.summary()}")
             continue
 
 
@@ -65,7 +102,10 @@ def update_in_progress_jobs(store, sheet_client):
             cntrl.go_to_printing_history()
             _job = scroll_to_job(job)
             if _job.status == "Printing":
-                check_machine_errors(job)
+                if dl.has_budget(ERROR_CHECK_RESERVE):
+                    check_machine_errors(job)
+                else:
+                    print(f"[Deadline] Skipping error check for {job.name}, {dl.remaining():.0f}s left")
             job.status = _job.status
         # sometimes jobs in the handy list don't update
         # after 48 hours we will default to complete to avoid long periods of scrolling down the list
@@ -89,29 +129,30 @@ def check_machine_errors(job):
         content = list(pr.parse_screen(long_clickable_only=False).keys())
         if content[1] not in job.errors:
             job.errors += content[1]
-        os.system("adb shell input keyevent KEYCODE_BACK")
+        cntrl.back()
 
 
-def scroll_to_job(job, prev_screen=None):
+def scroll_to_job(job):
     """
     Scroll through the print history to locate a specific job by name and date, returning the job or None.
     """
     print(f"Scrolling down to locate job {job.name}...")
-    screen = pr.parse_screen()
-    snapshots = list(screen.keys())
+    prev_screen = None
+    while True:
+        screen = pr.parse_screen()
 
-    # Stop scrolling if the screen has not changed
-    if prev_screen is not None and screen.keys() == prev_screen.keys():
-        print(f"Job {job.name} not found.")
-        return None
+        # Stop scrolling if the screen has not changed
+        if prev_screen is not None and screen.keys() == prev_screen.keys():
+            print(f"Job {job.name} not found.")
+            return None
 
-    for s in snapshots:
-        _job = job_from_screen_entry(s)
-        if _job.name == job.name and _job.date == job.date:
-            return _job
+        for s in screen.keys():
+            _job = job_from_screen_entry(s)
+            if _job.name == job.name and _job.date == job.date:
+                return _job
 
-    cntrl.scroll_down(screen)
-    return scroll_to_job(job, screen)
+        cntrl.scroll_down(screen)
+        prev_screen = screen
 
 
 def check_for_later_jobs(store, sheet_client):
@@ -123,7 +164,10 @@ def check_for_later_jobs(store, sheet_client):
     for s in screen.keys():
         j = job_from_screen_entry(s)
         if store.find_job(j.name, j.date) is None: 
-            get_job_details(screen[s], j)
+            if dl.has_budget(ENRICH_RESERVE):
+                get_job_details(screen[s], j)
+            else:
+                print(f"[Deadline] Skipping details for {j.name}, {dl.remaining():.0f}s left")
             store.add_job(j)
             sheet_client.update_job(j)
 
@@ -186,24 +230,25 @@ def job_from_screen_entry(s):
     )
 
 
-def get_init_job(sheet_client):
+def get_init_job(sheet_client, spool):
     """
     Return the job to resume on startup: earliest in-progress, most recent in sheets, or first GUI entry.
     """
     
-    # Earliest row that still needs updating
-    latest_job = sheet_client.get_oldest_in_progress_job()
+    # Earliest row that still needs updating, and the latest row, from one projected read
+    oldest_in_progress, most_recent = sheet_client.get_startup_jobs()
+    latest_job = oldest_in_progress
 
     # If no rows in progress, resume from latest row in sheet
     if latest_job is None:
-        latest_job = sheet_client.get_most_recent_job()
+        latest_job = most_recent
 
         # Fallback to GUI if no jobs recorded at all
         # This becomes the first entry.
         if latest_job is None:
             latest_job = get_first_gui_entry()
             latest_job = get_job_details(latest_job)
-            sheet_client.update_job(latest_job)
+            spool.update_job(latest_job)
 
     return latest_job
 
@@ -220,9 +265,10 @@ def get_first_gui_entry():
     return job
 
 
-def get_machine_statuses(mfa_display_sheet):
+def get_machine_statuses(mfa_display_sheet, publisher=None):
     printers=["Savage","Hyneman","Imahara","Belleci","combs","Byron"]
-    
+    rows = []
+
     for printer in printers:
         cntrl.go_to_device_page(printer)
         screen = pr.parse_screen(long_clickable_only=False)
@@ -237,32 +283,33 @@ def get_machine_statuses(mfa_display_sheet):
             completion = float(completion_str.replace('%', '')) / 100
             time_left = time_left_str
 
-        row_data = {"Printer": printer, "Status": status, "Completion": completion, "Time": time_left}
-        mfa_display_sheet.set_mfa_display_info(printers.index(printer) + 1, row_data)
-
+        rows.append({"Printer": printer, "Status": status, "Completion": completion, "Time": time_left})
+        # The kiosk gets each printer as soon as it is read; Sheets only mirrors the whole board below
+        if publisher is not None:
+            publisher.publish({"printer": printer, "status": status, "completion": completion, "time_left": time_left})
 
-def log_error(e):
-    ts = datetime.datetime.now().strftime("[%Y-%m-%d_%H-%M-%S]")
-    base_dir = "monitoring_errors"
-    os.makedirs(base_dir, exist_ok=True)
+    # One write for the whole board, and only if something changed
+    mfa_display_sheet.set_mfa_display_board(rows)
 
-    err_dir = os.path.join(base_dir, f"err_{ts}")
-    os.makedirs(err_dir, exist_ok=True)
 
-    # Error text
-    with open(os.path.join(err_dir, "error.txt"), "w") as f:
-        f.write(f"Error occurred at {ts}:\n{str(e)}\n")
-
-    # XML View
-    os.system("adb shell uiautomator dump /sdcard/view.xml")
-    os.system(f"adb pull /sdcard/view.xml {err_dir}/view.xml > /dev/null")
+def publish_usage(usage, usage_sheet):
+    """
+    Publish the compact usage summary. A failure here only delays the dashboard, so it never aborts the cycle.
+    """
+    try:
+        usage_sheet.replace_table(usage.summary_rows())
+    except Exception as e:
+        print(f"[Usage] Failed to publish summary: {e}")
 
-    # Screenshot
-    screenshot_path = os.path.join(err_dir, "screenshot.png")
-    with open(screenshot_path, "wb") as f:
-        subprocess.run(["adb", "exec-out", "screencap", "-p"], stdout=f)
 
-    print(f"Error logged in {err_dir}. Restarting loop...")
+def log_error(e):
+    """
+    Grab the screen for the error bundle; writing the bundle is left to the background worker.
+    """
+    global error_capture
+    if error_capture is None:
+        error_capture = ErrorCapture()
+    error_capture.submit(e)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+import itertools
+import threading
+
+
+class BroadcastHub:
+    """
+    Fans one producer's updates out to every subscribed client.
+    The producer is a single reader (the notification queue, the printer poller or status channel),
+    so each client sees every update instead of racing the others for it.
+    """
+
+    def __init__(self, name: str, initial=None):
+        self.name = name
+        self.latest = initial
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._ids = itertools.count()
+
+    def publish(self, value):
+        with self._lock:
+            self.latest = value
+            subscribers = list(self._subscribers.items())
+        for sub_id, callback in subscribers:
+            self._deliver(sub_id, callback, value)
+
+    def subscribe(self, callback, replay: bool = True):
+        """callback(value) on every publish; with replay, also right away with the latest value. Returns an unsubscribe function."""
+        with self._lock:
+            sub_id = next(self._ids)
+            self._subscribers[sub_id] = callback
+            latest = self.latest
+        if replay and latest is not None:
+            self._deliver(sub_id, callback, latest)
+        return lambda: self._remove(sub_id)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def _deliver(self, sub_id, callback, value):
+        try:
+            callback(value)
+        except Exception as e:
+            # A client that can't take updates any more is dropped rather than retried forever
+            print(f"[Broadcast] {self.name}: dropping subscriber {sub_id}: {e}")
+            self._remove(sub_id)
+
+    def _remove(self, sub_id):
+        with self._lock:
+            self._subscribers.pop(sub_id, None)
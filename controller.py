@@ -1,12 +1,33 @@
-import os
+import fcntl
 import re
-import subprocess
 import time
+from contextlib import contextmanager
 from lxml import etree
+import deadline as dl
 import parser as pr
 
+ANDROID_IP = "192.168.240.112"
+APP_PACKAGE = "bbl.intl.bambulab.com"
+WAYDROID_TIMEOUT = 120
+UI_LOCK_PATH = "/tmp/bambu_ui.lock"
+
+@contextmanager
+def ui_lock():
+    """
+    Exclusive use of the app's UI across processes (monitor and backfill both drive it over adb).
+    """
+    with open(UI_LOCK_PATH, "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def back():
+    dl.run(["adb", "shell", "input", "keyevent", "KEYCODE_BACK"])
+
 def go_to_printing_history():
-    os.system("adb shell input keyevent KEYCODE_BACK")
+    back()
     tap_by_desc("Me")
     tap_by_desc("Printing History")
 
@@ -16,10 +37,10 @@ def get_devices():
     return list(pr.parse_screen(long_clickable_only=False).keys())[:-1]
 
 def go_to_device_page(machine):
-    os.system("adb shell input keyevent KEYCODE_BACK")
+    back()
     tap_by_desc("Devices")
     if not find_by_desc("brand_logo"):
-        os.system("adb shell input keyevent KEYCODE_BACK")
+        back()
         tap_by_desc("Devices")
 
     tap_by_desc("brand_logo")
@@ -27,7 +48,7 @@ def go_to_device_page(machine):
     tap_by_desc(machine)
     machine_screen = pr.parse_screen(long_clickable_only=False)
     if machine_screen.keys() == list_screen.keys():
-        os.system("adb shell input keyevent KEYCODE_BACK")
+        back()
     time.sleep(1)
 
 
@@ -38,13 +59,13 @@ def tap_by_desc(desc, whole_match: bool = True):
         node = find_by_desc_including(desc)
     if node:
         tap_by_bounds(node)
+        return True
     else:
         return False
 
 def find_by_desc(desc): 
     """ Return the bounds of the first node matching the content description, or False if not found. """ 
-    os.system("adb shell uiautomator dump /sdcard/view.xml") 
-    os.system("adb pull /sdcard/view.xml >/dev/null") 
+    pr.dump_view()
     tree = etree.parse("view.xml") 
     node = tree.xpath(f"//node[@content-desc='{desc}']") 
     if(node is None): 
@@ -59,8 +80,7 @@ def find_by_desc_including(desc):
     """
     Return the bounds of the first node whose content-desc or text contains `desc`.
     """
-    os.system("adb shell uiautomator dump /sdcard/view.xml")
-    os.system("adb pull /sdcard/view.xml >/dev/null")
+    pr.dump_view()
     tree = etree.parse("view.xml")
 
     xpath = f"//node[contains(normalize-space(@content-desc), '{desc}')] | //node[contains(normalize-space(@text), '{desc}')]"
@@ -73,13 +93,46 @@ def find_by_desc_including(desc):
         return node[0].get("bounds")
 
 
+def restart_app():
+    """
+    Force-stop the Bambu Handy app and launch it again.
+    """
+    dl.run(["adb", "shell", "am", "force-stop", APP_PACKAGE])
+    dl.run(["waydroid", "app", "launch", APP_PACKAGE])
+
+
+def reconnect_adb():
+    """
+    Drop and re-establish the adb connection to the Waydroid container.
+    """
+    dl.run(["adb", "disconnect", ANDROID_IP])
+    dl.run(["adb", "connect", ANDROID_IP])
+
+
+def adb_connected():
+    """
+    Return True if adb reports the Android device as online.
+    """
+    result = dl.run(["adb", "get-state"], capture_output=True, text=True)
+    return result.stdout.strip() == "device"
+
+
+def restart_waydroid():
+    """
+    Restart the Waydroid container without tearing down the session, then relaunch the app.
+    """
+    dl.run(["sudo", "waydroid", "container", "restart"], cap=WAYDROID_TIMEOUT)
+    reconnect_adb()
+    dl.run(["waydroid", "app", "launch", APP_PACKAGE])
+
+
 def tap_by_bounds(bounds):
     """
     Tap the screen at the center of the given bounds string.
     """
     x, y = get_bounds_center(bounds)
     time.sleep(1)
-    subprocess.run(["adb", "shell", "input", "tap", str(x), str(y)])
+    dl.run(["adb", "shell", "input", "tap", str(x), str(y)])
     print(f"Tapped at {x},{y}")
 
 
@@ -97,7 +150,7 @@ def swipe_by_bounds(bounds1, bounds2):
     x1, y1 = get_bounds_center(bounds1)
     x2, y2 = get_bounds_center(bounds2)
     time.sleep(1)
-    subprocess.run(["adb", "shell", "input", "swipe", str(x1), str(y1), str(x2), str(y2)])
+    dl.run(["adb", "shell", "input", "swipe", str(x1), str(y1), str(x2), str(y2)])
     print(f"Swiped from {x1},{y1} to {x2},{y2}")
 
 
@@ -0,0 +1,85 @@
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+DEFAULT_TIMEOUT = 30  # per-operation cap when no tighter deadline applies
+
+_local = threading.local()
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """
+    A monotonic time budget. Operations started under it take their timeout from what is left.
+    """
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def __repr__(self):
+        return f"<Deadline {self.remaining():.1f}s of {self.budget}s left>"
+
+
+@contextmanager
+def cycle(budget: float):
+    """Run the enclosed block under a deadline of `budget` seconds for this thread."""
+    previous = current()
+    _local.deadline = Deadline(budget)
+    try:
+        yield _local.deadline
+    finally:
+        _local.deadline = previous
+
+
+def current() -> Optional[Deadline]:
+    return getattr(_local, "deadline", None)
+
+
+def remaining() -> Optional[float]:
+    d = current()
+    return d.remaining() if d else None
+
+
+def has_budget(seconds: float) -> bool:
+    """True if there is no active deadline or at least `seconds` of it remain."""
+    d = current()
+    return d is None or d.remaining() >= seconds
+
+
+def timeout(cap: float = DEFAULT_TIMEOUT) -> float:
+    """
+    Timeout for the next operation: the smaller of `cap` and the remaining budget.
+    Raises DeadlineExceeded if the budget is already spent.
+    """
+    d = current()
+    if d is None:
+        return cap
+    left = d.remaining()
+    if left <= 0:
+        raise DeadlineExceeded(f"cycle budget of {d.budget}s exhausted")
+    return min(cap, left)
+
+
+def run(cmd, cap: float = DEFAULT_TIMEOUT, **kwargs):
+    """
+    subprocess.run with a timeout inherited from the current deadline.
+    A command that overruns is killed and reported as DeadlineExceeded.
+    """
+    t = timeout(cap)
+    try:
+        return subprocess.run(cmd, timeout=t, **kwargs)
+    except subprocess.TimeoutExpired:
+        print(f"[Deadline] Cancelled after {t:.1f}s: {cmd}")
+        raise DeadlineExceeded(f"{cmd} timed out after {t:.1f}s")
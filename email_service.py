@@ -1,18 +1,18 @@
-from datetime import datetime, timezone
 import os
 import json
 import base64
-import re
+import queue
 import threading
-import time
+from collections import deque
 from flask import Flask, request
+from waitress import serve
 from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from email.utils import parsedate_to_datetime
 
-from notification_store import FixedQueue, Notification
+import rate_limit as rl
+from notification_store import GMAIL_COLORS, Notification, NotificationStore
 
 # === Configuration ===
 PROJECT_ID = 'bambu-mfa-with-oauth'
@@ -23,13 +23,20 @@ SCOPES = [
 ]
 PORT = 8080
 LIFETIME = 300.0
-WATCH_INTERVAL = 1.0
+HISTORY_PAGE_SIZE = 500
+BATCH_LIMIT = 50  # Gmail's recommended maximum requests per batch
+MESSAGE_FIELDS = "id,labelIds,snippet,payload/headers"
+SEEN_PUSH_IDS = 1000  # Pub/Sub messageIds remembered for dedupe
 
 # === Globals ===
 app = Flask(__name__)   # This API
 gmail = None            # Gmail API
 queue_out = None        # Shared queue with UI
 notifier = None         # Notifications manager
+history_queue = queue.Queue()            # historyIds from pushes, drained by history_worker
+seen_order = deque(maxlen=SEEN_PUSH_IDS)  # recent Pub/Sub messageIds, oldest first
+seen_ids = set()
+seen_lock = threading.Lock()
 
 def main(out_q=None):
     global notifier
@@ -38,13 +45,16 @@ def main(out_q=None):
     global gmail
     gmail = connect_oauth()
     register_watch(gmail)
-    print(f"\n Flask server listening on port {PORT}")
-    app.run(host="0.0.0.0", port=PORT, threaded=True, use_reloader=False)
+    threading.Thread(target=history_worker, daemon=True).start()
+    print(f"\n Push endpoint listening on port {PORT}")
+    # Flask app served by waitress, a production WSGI server, instead of the development server
+    serve(app, host="0.0.0.0", port=PORT)
 
 
 # === Pub/Sub Push Endpoint ===
 @app.route("/pubsub/push", methods=["POST"])
 def receive_push():
+    """Validate, dedupe and enqueue; Gmail is only called from history_worker, so the ack is immediate."""
     envelope = request.get_json(silent=True)
     if not envelope or "message" not in envelope:
         print("Invalid push request")
@@ -52,23 +62,49 @@ def receive_push():
 
     msg = envelope["message"]
     data = msg.get("data")
-
-    if data:
-        payload = base64.b64decode(data).decode("utf-8")
-        print("\nReceived push payload:", payload)
-        try:
-            payload_json = json.loads(payload)
-            history_id = payload_json.get("historyId")
-            if history_id:
-                fetch_latest_email_from_history(gmail, history_id)
-        except Exception as e:
-            print("Error processing payload:", e)
-    else:
+    if not data:
         print("\nReceived Pub/Sub message with no data")
+        return ("", 200)
 
+    try:
+        payload = json.loads(base64.b64decode(data).decode("utf-8"))
+        history_id = int(payload["historyId"])
+    except Exception as e:
+        # Redelivering a malformed payload will never help, so it is acked too
+        print("Error decoding payload:", e)
+        return ("", 200)
+
+    # Only a push that is about to be queued counts as seen, so a redelivery of anything else still gets through
+    message_id = msg.get("messageId") or msg.get("message_id")
+    if message_id:
+        with seen_lock:
+            if message_id in seen_ids:
+                print(f"Ignoring redelivered push {message_id}")
+                return ("", 200)
+            if len(seen_order) == seen_order.maxlen:
+                seen_ids.discard(seen_order[0])
+            seen_order.append(message_id)
+            seen_ids.add(message_id)
+
+    print("\nReceived push for historyId", history_id)
+    history_queue.put(history_id)
     return ("", 200)
 
 
+def history_worker():
+    """Single consumer of pushed historyIds, so history is fetched in order and one range at a time."""
+    while True:
+        history_id = history_queue.get()
+        # Pushes that piled up while Gmail was slow are covered by one fetch up to the newest of them
+        # (the very first push only sets the baseline, so it is never merged away)
+        while last_seen_history_id is not None and not history_queue.empty():
+            history_id = max(history_id, history_queue.get_nowait())
+        try:
+            fetch_latest_email_from_history(gmail, history_id)
+        except Exception as e:
+            print("Error processing history:", e)
+
+
 # === Gmail OAuth ===
 def connect_oauth():
     """Authenticate user and return Gmail API client."""
@@ -94,7 +130,7 @@ def register_watch(gmail):
     """Tell Gmail to publish inbox changes to the Pub/Sub topic."""
     topic = f"projects/{PROJECT_ID}/topics/{TOPIC_ID}"
     body = {"topicName": topic, "labelIds": ["INBOX"]}
-    response = gmail.users().watch(userId="me", body=body).execute()
+    response = rl.call("gmail", gmail.users().watch(userId="me", body=body).execute, cost=rl.GMAIL_COST["watch"])
     print("Gmail watch registered:")
     print(json.dumps(response, indent=2))
 
@@ -115,43 +151,90 @@ def fetch_latest_email_from_history(gmail, new_history_id):
         return
 
     print(f"Fetching history from {last_seen_history_id} → {new_history_id}")
-
-    response = gmail.users().history().list(
-        userId="me",
-        startHistoryId=last_seen_history_id,
-        historyTypes=["messageAdded"]
-    ).execute()
-
+    msg_ids = list_added_messages(gmail, last_seen_history_id)
     last_seen_history_id = new_history_id  # update baseline
 
-    records = response.get("history", [])
-    if not records:
+    if not msg_ids:
         print("No new messages in history.")
         return
 
-    for record in records:
-        for added in record.get("messagesAdded", []):
-            msg_id = added["message"]["id"]
-            msg = gmail.users().messages().get(
-                userId="me", id=msg_id, format="full"
-            ).execute()
+    for msg in fetch_messages(gmail, msg_ids):
+        addNotification(msg["id"], msg)
+
+
+def list_added_messages(gmail, start_history_id):
+    """Every page of history since start_history_id: ids of added inbound messages, oldest first."""
+    msg_ids, seen = [], set()
+    page_token = None
+    while True:
+        response = rl.call("gmail", gmail.users().history().list(
+            userId="me",
+            startHistoryId=start_history_id,
+            historyTypes=["messageAdded"],
+            maxResults=HISTORY_PAGE_SIZE,
+            pageToken=page_token,
+        ).execute, cost=rl.GMAIL_COST["history.list"])
+
+        for record in response.get("history", []):
+            for added in record.get("messagesAdded", []):
+                message = added["message"]
+                # History records carry labels already, so outgoing mail is dropped before any fetch
+                labels = message.get("labelIds", [])
+                if "SENT" in labels or "DRAFT" in labels or message["id"] in seen:
+                    continue
+                seen.add(message["id"])
+                msg_ids.append(message["id"])
+
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return msg_ids
 
-            if "SENT" in msg.get("labelIds", []) or "DRAFT" in msg.get("labelIds", []):
-                continue
 
-            addNotification(msg_id, msg)
+def fetch_messages(gmail, msg_ids):
+    """Headers and snippet for each message, BATCH_LIMIT messages per HTTP batch request."""
+    results = {}
+    for i in range(0, len(msg_ids), BATCH_LIMIT):
+        chunk = msg_ids[i:i + BATCH_LIMIT]
+        rl.call("gmail", execute_batch, gmail, chunk, results,
+                cost=rl.GMAIL_COST["messages.get"] * len(chunk))
+    return [results[m] for m in msg_ids if m in results]
+
+
+def execute_batch(gmail, msg_ids, results):
+    """One batch for the ids not fetched yet. Re-raises a 429 so rl.call retries only what is missing."""
+    throttled = []
+
+    def on_response(request_id, response, exception):
+        if exception is None:
+            results[request_id] = response
+        elif rl.is_rate_limited(exception):
+            throttled.append(exception)
+        else:
+            print(f"Error fetching message {request_id}:", exception)
+
+    batch = gmail.new_batch_http_request(callback=on_response)
+    for msg_id in msg_ids:
+        if msg_id not in results:
+            batch.add(gmail.users().messages().get(
+                userId="me", id=msg_id, format="metadata",
+                metadataHeaders=["Subject", "Date"], fields=MESSAGE_FIELDS,
+            ), request_id=msg_id)
+    batch.execute()
+    if throttled:
+        raise throttled[0]
 
 
 # === Notification Management ===
 class NotificationController:
     def __init__(self, out_q):
         self.queue_out = out_q
-        self.local_queue = FixedQueue()
-        start_watcher(out_q, self.local_queue)
+        self.store = NotificationStore(colors=GMAIL_COLORS, lifetime=LIFETIME)
+        # The UI gets a snapshot, then a diff per change (new code, color step, expiry)
+        if out_q is not None:
+            self.store.subscribe(out_q.put, initial=True)
 
     def add_notification(self, notif):
-        self.local_queue.push(notif)
-        self.queue_out.put(list(self.local_queue.queue))
+        self.store.push(notif)
 
 def addNotification(msg_id, msg):
     try:
@@ -166,40 +249,5 @@ def addNotification(msg_id, msg):
     except Exception as e:
         print("Error adding notification:", e)
 
-def start_watcher(out_q, local_queue):
-    """Background thread: update colors and expire notifications."""
-    def watcher():
-        while True:
-            now = datetime.now(timezone.utc)
-            changed = False
-            for note in list(local_queue.queue):
-                if not note.time or not note.expires_at:
-                    continue
-                total = (note.expires_at - note.time).total_seconds()
-                elapsed = (now - note.time).total_seconds()
-                ratio = elapsed / total
-
-                if ratio >= 1.0:
-                    local_queue.queue.remove(note)
-                    changed = True
-                    continue
-
-                color = (
-                    'green' if ratio < 1/3 else
-                    'yellow' if ratio < 2/3 else
-                    'red'
-                )
-                if note.color != color:
-                    note.color = color
-                    changed = True
-
-            if changed:
-                # send entire queue snapshot to UI
-                out_q.put(list(local_queue.queue))
-
-            time.sleep(WATCH_INTERVAL)
-
-    threading.Thread(target=watcher, daemon=True).start()
-
 if __name__ == "__main__":
     main()
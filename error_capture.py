@@ -0,0 +1,107 @@
+import datetime
+import os
+import queue
+import subprocess
+import threading
+import time
+import traceback
+import zipfile
+
+BASE_DIR = "monitoring_errors"
+MAX_BUNDLES = 50                    # ring buffer: newest N bundles are kept
+MAX_TOTAL_BYTES = 50 * 1024 * 1024  # ...and never more than this on disk
+DEDUPE_WINDOW = 600                 # seconds an identical error is suppressed after capture
+QUEUE_SIZE = 8
+
+
+class ErrorCapture:
+    """
+    Captures error bundles (text, UI dump, screenshot). The screen is grabbed synchronously in submit(),
+    while it still shows the error; zipping and eviction happen on a background thread. Each bundle is a single compressed zip in BASE_DIR; old bundles are evicted ring-buffer style.
+    """
+
+    def __init__(self, base_dir: str = BASE_DIR):
+        self.base_dir = base_dir
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._last_seen = {}  # signature -> monotonic time of last capture
+        self._suppressed = {}  # signature -> duplicates since last capture
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def submit(self, e: Exception):
+        """
+        Grab the UI dump and screenshot, then queue the bundle for writing. Duplicates within DEDUPE_WINDOW
+        are counted, not captured. Call with controller.ui_lock() held and before any recovery touches the screen.
+        """
+        sig = f"{type(e).__name__}: {e}"
+        now = time.monotonic()
+        last = self._last_seen.get(sig)
+        if last is not None and now - last < DEDUPE_WINDOW:
+            self._suppressed[sig] = self._suppressed.get(sig, 0) + 1
+            print(f"[ErrorCapture] Duplicate error suppressed ({self._suppressed[sig]}x): {sig}")
+            return
+
+        self._last_seen[sig] = now
+        if len(self._last_seen) > 256:
+            self._last_seen = {k: t for k, t in self._last_seen.items() if now - t < DEDUPE_WINDOW}
+        ts = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+        text = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        try:
+            view, screenshot = self._snapshot()
+        except Exception as capture_error:
+            print(f"[ErrorCapture] Screen capture failed: {capture_error}")
+            view, screenshot = b"", b""
+        try:
+            self._queue.put_nowait((ts, sig, text, self._suppressed.pop(sig, 0), view, screenshot))
+        except queue.Full:
+            print(f"[ErrorCapture] Capture queue full, dropping: {sig}")
+
+    def _worker(self):
+        while True:
+            ts, sig, text, suppressed, view, screenshot = self._queue.get()
+            try:
+                path = self._capture(ts, sig, text, suppressed, view, screenshot)
+                self._evict()
+                print(f"[ErrorCapture] Error logged in {path}")
+            except Exception as e:
+                print(f"[ErrorCapture] Capture failed: {e}")
+
+    @staticmethod
+    def _snapshot():
+        """UI dump and screenshot bytes of the screen as it is right now."""
+        # Dump to a separate device path so the monitor's own view.xml is not clobbered
+        subprocess.run(["adb", "shell", "uiautomator", "dump", "/sdcard/err_view.xml"],
+                       capture_output=True, timeout=30)
+        view = subprocess.run(["adb", "exec-out", "cat", "/sdcard/err_view.xml"],
+                              capture_output=True, timeout=30).stdout
+        screenshot = subprocess.run(["adb", "exec-out", "screencap", "-p"],
+                                    capture_output=True, timeout=30).stdout
+        return view, screenshot
+
+    def _capture(self, ts, sig, text, suppressed, view, screenshot):
+        os.makedirs(self.base_dir, exist_ok=True)
+        path = os.path.join(self.base_dir, f"err_{ts}.zip")
+
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+            header = f"Error occurred at {ts}:\n{sig}\n"
+            if suppressed:
+                header += f"({suppressed} identical errors suppressed since the previous capture)\n"
+            z.writestr("error.txt", header + "\n" + text)
+            z.writestr("view.xml", view)
+            # PNG is already compressed
+            z.writestr("screenshot.png", screenshot, compress_type=zipfile.ZIP_STORED)
+        return path
+
+    def _evict(self):
+        """Delete the oldest bundles until both the count and size limits hold."""
+        bundles = sorted(
+            os.path.join(self.base_dir, f)
+            for f in os.listdir(self.base_dir)
+            if f.startswith("err_") and f.endswith(".zip")
+        )
+        sizes = {b: os.path.getsize(b) for b in bundles}
+        total = sum(sizes.values())
+        while bundles and (len(bundles) > MAX_BUNDLES or total > MAX_TOTAL_BYTES):
+            oldest = bundles.pop(0)
+            total -= sizes[oldest]
+            os.remove(oldest)
@@ -1,29 +1,182 @@
-from typing import List, Optional
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import List, Optional, Tuple
 import gspread
 from datetime import datetime
+import deadline as dl
+import metrics
+import rate_limit as rl
 from job_store import PrintJob
 
 CREDENTIALS_PATH = 'printer-monitoring-474822-bdfc6f0da109.json'
 SPREADSHEET_NAME = "print-records"
+SHEETS_TIMEOUT = 30  # per-request cap; tightened by the caller's cycle deadline
+INDEX_REVALIDATE_SECONDS = 300  # how long the row index is trusted before a cheap recheck
+DATE_FORMAT = "%m/%d/%Y %H:%M"
+SPREADSHEET_KEY_PATH = "spreadsheet_key.txt"  # cached after the first open-by-name
+WATERMARK_PATH = "watermark_{}.txt"  # first row the startup scan needs to read, per worksheet
+HOT_RETENTION_DAYS = 60  # finished jobs older than this roll into per-month archive worksheets
+ARCHIVE_COLUMNS = 8
+DISPLAY_TIMESTAMP_COLUMN = "F"  # device_status!F1 holds when the board was last written
+DISPLAY_HEARTBEAT = 300  # seconds; an unchanged board still has its F1 timestamp refreshed this often
+
+
+class SheetSession:
+    """
+    One authenticated gspread connection per process. Opens the spreadsheet by key
+    (looked up by name only once, then cached on disk) and hands out worksheet handles.
+    """
+
+    def __init__(self, credentials_path: str = CREDENTIALS_PATH, spreadsheet_name: str = SPREADSHEET_NAME,
+                 spreadsheet=None):
+        """
+        `spreadsheet` plugs in an already-open backend with the gspread Spreadsheet interface
+        (e.g. local_sheets.LocalSpreadsheet) instead of connecting to Google.
+        """
+        self.credentials_path = credentials_path
+        self.spreadsheet_name = spreadsheet_name
+        self._lock = threading.Lock()
+        self._request_lock = threading.RLock()  # one request at a time on the shared client
+        self._client = None
+        self._spreadsheet = spreadsheet
+        self._worksheets = {}
+
+    def spreadsheet(self):
+        with self._lock:
+            if self._spreadsheet is not None and self._client is None:
+                return self._spreadsheet
+            if self._client is None:
+                self._client = gspread.service_account(filename=self.credentials_path)
+            if self._spreadsheet is None:
+                self._spreadsheet = self._open()
+            return self._spreadsheet
+
+    def request(self, fn, *args, **kwargs):
+        """
+        Run one Sheets request. The gspread client and its requests.Session are shared by every
+        thread, so requests are serialized, and each sets the HTTP timeout from the calling
+        thread's own deadline while it holds the client.
+        """
+        with self._request_lock:
+            if self._client is not None:
+                self._client.set_timeout(dl.timeout(SHEETS_TIMEOUT))
+            return fn(*args, **kwargs)
+
+    def call(self, api: str, fn, *args, **kwargs):
+        """rl.call through request(): the rate limiter waits outside the lock, the request runs inside it."""
+        return rl.call(api, self.request, fn, *args, **kwargs)
+
+    def worksheet(self, name: str, create: bool = False):
+        spreadsheet = self.spreadsheet()
+        with self._lock:
+            if name not in self._worksheets:
+                try:
+                    self._worksheets[name] = self.call("sheets_read", spreadsheet.worksheet, name)
+                except gspread.exceptions.WorksheetNotFound:
+                    if not create:
+                        raise
+                    print(f"[SheetSession] Creating worksheet {name}")
+                    self._worksheets[name] = self.call(
+                        "sheets_write", spreadsheet.add_worksheet, name, rows=1000, cols=ARCHIVE_COLUMNS
+                    )
+            return self._worksheets[name]
+
+    def batch_get(self, ranges: List[str], priority: int = rl.PRIORITY_JOBS) -> List[List[List[str]]]:
+        """
+        Read several A1 ranges, possibly on different worksheets, in one values.batchGet.
+        Returns the rows of each range in the order requested.
+        """
+        response = self.call("sheets_read", self.spreadsheet().values_batch_get, ranges, priority=priority)
+        return [vr.get("values", []) for vr in response.get("valueRanges", [])]
+
+    def _open(self):
+        """Open by cached key; fall back to the (Drive search) lookup by name and cache the key."""
+        if os.path.exists(SPREADSHEET_KEY_PATH):
+            with open(SPREADSHEET_KEY_PATH) as f:
+                key = f.read().strip()
+            try:
+                return self.call("sheets_read", self._client.open_by_key, key)
+            except gspread.exceptions.SpreadsheetNotFound:
+                print(f"[SheetSession] Cached key {key} not found, looking up by name")
+
+        spreadsheet = self.call("sheets_read", self._client.open, self.spreadsheet_name)
+        with open(SPREADSHEET_KEY_PATH, "w") as f:
+            f.write(spreadsheet.id)
+        return spreadsheet
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> SheetSession:
+    """The process-wide SheetSession, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = SheetSession()
+        return _session
+
+
+def set_session(session: SheetSession):
+    """Replace the process-wide session, e.g. with one over a local backend for tests and benchmarks."""
+    global _session
+    with _session_lock:
+        _session = session
+
+
+def prime(*clients: "SheetClient"):
+    """Load several SheetClients' worksheets in a single batchGet instead of one read each."""
+    ranges = [f"'{c.worksheet_name}'!A:H" for c in clients]
+    for client, values in zip(clients, get_session().batch_get(ranges, clients[0].priority)):
+        client._build_index(values)
+
 
 class SheetClient:
-    def __init__(self, worksheet_name):
-        self.credentials_path = CREDENTIALS_PATH
-        self.spreadsheet_name = SPREADSHEET_NAME
+    def __init__(self, worksheet_name, session: Optional[SheetSession] = None, priority: int = rl.PRIORITY_JOBS,
+                 hot_days: Optional[int] = None, create: bool = False):
         self.worksheet_name = worksheet_name
-        self._client = None
-        self._spreadsheet = None
-        self._sheet = None
+        self.priority = priority  # rate-limit priority of this client's requests
+        self.hot_days = hot_days  # if set, finished jobs older than this live in "<name> YYYY-MM" archives
+        self.create = create
+        self._session = session
+        self._partitions = {}
+        # (name, date) -> row number, loaded once and kept in step with our own writes
+        self._index = None
+        self._rows = {}
+        self._row_count = 0
+        self._validated_at = 0.0
+        # row -> hash of the values last written to / read from it, to skip no-op writes
+        self._row_hashes = {}
+        self._table_hash = None  # last table sent by replace_table
+        self._board_written_at = 0.0  # monotonic time of the last display board write
+        # Write buffer, active inside batch(): row -> values, and (name, date) -> values for new rows
+        self._buffering = False
+        self._pending_updates = {}
+        self._pending_appends = {}
+
+    def _connect_session(self) -> SheetSession:
+        if self._session is None:
+            self._session = get_session()
+        return self._session
 
     def _connect(self):
-        """Lazy initialization of gspread client and worksheet."""
-        if self._client is None:
-            self._client = gspread.service_account(filename=self.credentials_path)
-        if self._spreadsheet is None:
-            self._spreadsheet = self._client.open(self.spreadsheet_name)
-        if self._sheet is None:
-            self._sheet = self._spreadsheet.worksheet(self.worksheet_name)
-        return self._sheet
+        """Worksheet handle from the shared session."""
+        return self._connect_session().worksheet(self.worksheet_name, create=self.create)
+
+    def _read(self, fn, *args, **kwargs):
+        """Run a read request through the shared rate limiter at this client's priority."""
+        return self._connect_session().call("sheets_read", fn, *args, priority=self.priority,
+                                            timeout=dl.remaining(), **kwargs)
+
+    def _write(self, fn, *args, **kwargs):
+        return self._connect_session().call("sheets_write", fn, *args, priority=self.priority,
+                                            timeout=dl.remaining(), **kwargs)
 
     def find_job_row(self, name: str, date: datetime):
         """
@@ -31,46 +184,286 @@ class SheetClient:
         If found, returns the row number and row.
         If not found, returns the next available empty row number.
         """
-        ws = self._connect()
-        all_values = ws.get_all_values()
+        if self._index is None or not self._index_valid():
+            self._load_index()
 
-        for i, row in enumerate(all_values, start=1):
-            if len(row) < 3:
-                continue
+        i = self._index.get((name, date))
+        if i is None:
+            return self._row_count + 1, ""
+        return i, self._rows[i]
 
-            row_name = row[0].strip()
-            row_date_str = row[2].strip()
+    def update_job(self, job):
+        """
+        Finds the row for the given job by name and date.
+        Overwrites that row’s data, or writes it to the next empty row if not found.
+        Inside batch() the write is buffered until the batch is flushed.
+        """
+        target = self._route(job)
+        if target is not self:
+            target.update_job(job)
+            return
+
+        if self._buffering:
+            self._stage_job(job)
+            return
 
+        i, row = self.find_job_row(job.name, job.date)
+        values = self.map_job_to_row(job, row)
+        if not self._row_changed(i, values):
+            return
+        self._write(self._connect().update, f"A{i}:H{i}", [values])
+        self._remember_row(i, values)
+
+    @contextmanager
+    def batch(self):
+        """
+        Buffer update_job calls and send them on exit as one batch_update plus one append.
+        """
+        self._buffering = True
+        try:
+            yield self
+        finally:
+            self._buffering = False
+            self.flush()
+
+    def flush(self):
+        """Send all buffered row writes: existing rows in one batch_update, new rows in one append."""
+        for partition in self._partitions.values():
+            partition._buffering = False
+            partition.flush()
+
+        updates, self._pending_updates = self._pending_updates, {}
+        appends, self._pending_appends = self._pending_appends, {}
+        if not updates and not appends:
+            return
+
+        ws = self._connect()
+        if updates:
+            self._write(ws.batch_update, [
+                {"range": f"A{i}:H{i}", "values": [values]}
+                for i, values in sorted(updates.items())
+            ])
+            for i, values in updates.items():
+                self._remember_row(i, values)
+
+        if appends:
+            rows = list(appends.values())
             try:
-                row_date = datetime.strptime(row_date_str, "%m/%d/%Y %H:%M")
+                response = self._write(ws.append_rows, rows)
             except Exception:
-                continue
+                # The append may have landed even though the call failed; re-read before the retry
+                self._index = None
+                raise
+            first = self._first_appended_row(response)
+            if first is None:
+                # Can't tell where the rows landed; rebuild the index on next use
+                self._index = None
+            else:
+                for offset, values in enumerate(rows):
+                    self._remember_row(first + offset, values)
 
-            if row_name == name and row_date == date:
-                return i, row
+        print(f"[SheetClient] Flushed {len(updates)} updates and {len(appends)} appends to {self.worksheet_name}")
 
-        return len(all_values) + 1, ""
+    def _route(self, job) -> "SheetClient":
+        """
+        The partition a job's row belongs in: this (hot) sheet unless the job is finished,
+        older than the hot window and not still sitting here from before the last rollover.
+        """
+        if self.hot_days is None or job.status.strip().lower() == "printing" or job.date >= self._boundary():
+            return self
+        _, row = self.find_job_row(job.name, job.date)
+        if row:
+            return self
+        return self._partition(job.date)
 
-    def update_job(self, job):
+    def _boundary(self, now: Optional[datetime] = None) -> datetime:
+        return (now or datetime.now()) - timedelta(days=self.hot_days)
+
+    def _partition(self, date: datetime) -> "SheetClient":
+        name = f"{self.worksheet_name} {date:%Y-%m}"
+        if name not in self._partitions:
+            self._partitions[name] = SheetClient(name, self._session, self.priority, create=True)
+        partition = self._partitions[name]
+        partition._buffering = self._buffering
+        return partition
+
+    def rollover(self, now: Optional[datetime] = None) -> int:
         """
-        Finds the row for the given job by name and date.
-        Overwrites that row’s data, or writes it to the next empty row if not found.
+        Move finished jobs older than the hot window into their month's archive worksheet,
+        then delete them from this sheet in one request. Returns the number of rows moved.
+        Only the status and date columns are read unless there is something to move.
+        Must not run while other writers are adding rows to this sheet.
         """
+        if self.hot_days is None:
+            return 0
+        boundary = self._boundary(now)
         ws = self._connect()
+
+        old = []
+        for i, row in enumerate(self._read(ws.get, "B:C"), start=1):
+            if len(row) < 2 or row[0].strip().lower() == "printing":
+                continue
+            try:
+                if datetime.strptime(row[1].strip(), DATE_FORMAT) < boundary:
+                    old.append(i)
+            except Exception:
+                continue
+        if not old:
+            return 0
+
+        block = self._read(ws.get, f"A{old[0]}:H{old[-1]}")
+        for i in old:
+            row = (block[i - old[0]] + [""] * ARCHIVE_COLUMNS)[:ARCHIVE_COLUMNS]
+            partition = self._partition(datetime.strptime(row[2].strip(), DATE_FORMAT))
+            partition._buffering = True
+            partition.update_job(self.row_to_printjob(row))
+        # Archive writes are upserts, so a crash before the delete below only repeats them next time
+        for partition in self._partitions.values():
+            partition._buffering = False
+            partition.flush()
+
+        # Contiguous runs, deleted bottom-up so earlier row numbers stay valid
+        runs = []
+        for i in old:
+            if runs and runs[-1][1] == i - 1:
+                runs[-1][1] = i
+            else:
+                runs.append([i, i])
+        requests = [
+            {"deleteDimension": {"range": {"sheetId": ws.id, "dimension": "ROWS", "startIndex": start - 1, "endIndex": end}}}
+            for start, end in reversed(runs)
+        ]
+        self._write(self._session.spreadsheet().batch_update, {"requests": requests})
+
+        # Row numbers shifted
+        self._index = None
+        self._row_hashes = {}
+        self.reset_watermark()
+        print(f"[SheetClient] Rolled {len(old)} rows older than {boundary:%Y-%m-%d} out of {self.worksheet_name}")
+        return len(old)
+
+    def _stage_job(self, job):
+        key = (job.name, job.date)
+        if key in self._pending_appends:
+            self._pending_appends[key] = self.map_job_to_row(job, self._pending_appends[key])
+            return
+
         i, row = self.find_job_row(job.name, job.date)
-        values = self.map_job_to_row(job, row)
-        ws.update(f"A{i}:H{i}", [values])
+        if row:
+            values = self.map_job_to_row(job, self._pending_updates.get(i, row))
+            if self._row_changed(i, values):
+                self._pending_updates[i] = values
+            else:
+                self._pending_updates.pop(i, None)
+        else:
+            self._pending_appends[key] = self.map_job_to_row(job)
+
+    @staticmethod
+    def _first_appended_row(response):
+        """Row number of the first appended row, from a values.append response's updatedRange."""
+        try:
+            updated = response["updates"]["updatedRange"]
+        except (TypeError, KeyError):
+            return None
+        m = re.search(r"![A-Z]+(\d+)", updated)
+        return int(m.group(1)) if m else None
+
+    def _load_index(self):
+        """Download the sheet once and build the (name, date) -> row index."""
+        self._build_index(self._read(self._connect().get_all_values))
+
+    def _build_index(self, all_values: List[List[str]]):
+        self._index = {}
+        self._rows = {}
+        self._row_hashes = {}
+        for i, row in enumerate(all_values, start=1):
+            self._row_hashes[i] = self._content_hash(row)
+            key = self._row_key(row)
+            if key is not None:
+                self._index[key] = i
+                self._rows[i] = row
+        self._row_count = len(all_values)
+        self._validated_at = time.monotonic()
+        print(f"[SheetClient] Indexed {len(self._index)} rows of {self.worksheet_name}")
+
+    def _index_valid(self) -> bool:
+        """
+        Cheap revalidation: the row after our last one must still be empty, and the last row
+        plus one random indexed row must still hold the keys we expect.
+        """
+        if time.monotonic() - self._validated_at < INDEX_REVALIDATE_SECONDS:
+            return True
+
+        n = self._row_count
+        spot = random.choice(list(self._rows)) if self._rows else n
+        ranges = [f"A{n + 1}:C{n + 1}", f"A{n}:C{n}", f"A{spot}:C{spot}"] if n else ["A1:C1"]
+        results = self._read(self._connect().batch_get, ranges)
+
+        if any(cell for row in results[0] for cell in row):
+            print("[SheetClient] Sheet grew outside this client, reloading index")
+            return False
+        for (row_number, got) in zip((n, spot), results[1:]):
+            expected = self._rows.get(row_number)
+            got_row = got[0] if got else []
+            if expected is not None and self._row_key(got_row) != self._row_key(expected):
+                print(f"[SheetClient] Row {row_number} moved, reloading index")
+                return False
+
+        self._validated_at = time.monotonic()
+        return True
+
+    def _row_changed(self, i: int, values: list) -> bool:
+        """
+        True if `values` differ from what row i is known to hold. Counts sent vs suppressed writes.
+        """
+        if self._row_hashes.get(i) == self._content_hash(values):
+            metrics.inc("sheets.writes_suppressed")
+            return False
+        metrics.inc("sheets.writes_sent")
+        return True
+
+    @staticmethod
+    def _content_hash(values: list) -> int:
+        """Hash of the row as Sheets renders it, so 3.0 written matches "3" read back."""
+        rendered = []
+        for v in values:
+            if isinstance(v, float) and v.is_integer():
+                v = int(v)
+            rendered.append(str(v).strip())
+        # Sheets pads rows to the grid width; trailing blanks don't count as content
+        while rendered and not rendered[-1]:
+            rendered.pop()
+        return hash(tuple(rendered))
+
+    def _remember_row(self, i: int, values: list):
+        self._row_hashes[i] = self._content_hash(values)
+        key = self._row_key([str(v) for v in values])
+        if self._index is not None and key is not None:
+            self._index[key] = i
+            self._rows[i] = values
+            self._row_count = max(self._row_count, i)
+
+    @staticmethod
+    def _row_key(row):
+        if len(row) < 3:
+            return None
+        try:
+            return row[0].strip(), datetime.strptime(row[2].strip(), DATE_FORMAT)
+        except Exception:
+            return None
 
     def map_job_to_row(self, job, row = None):
         """
         Maps PrintJob object to literals for data entry
         """
-        errors = row[7] if row and len(row) > 7 else ""
-        errors += (" " + job.errors) if job.errors not in errors else ""
+        # job.errors accumulates in memory, so merge without re-appending what the row already holds
+        errors = (row[7] if row and len(row) > 7 else "").strip()
+        if job.errors and job.errors not in errors:
+            errors = job.errors if errors in job.errors else f"{errors} {job.errors}"
         values = [
             job.name,
             job.status,
-            job.date.strftime("%m/%d/%Y %H:%M"),
+            job.date.strftime(DATE_FORMAT),
             job.duration,
             job.machine,
             job.weight,
@@ -83,41 +476,78 @@ class SheetClient:
         """
         Returns the oldest PrintJob that is still in progress (status = 'Printing').
         """
-        ws = self._connect()
-        rows = ws.get_all_values()
-
-        if not rows:
-            return None
-
-        # Convert and filter
-        jobs = [
-            self.row_to_printjob(r)
-            for r in rows
-            if len(r) >= 2 and r[1].strip().lower() == "printing"
-        ]
-
-        if not jobs:
-            return None
-
-        return min(jobs, key=lambda j: j.date)
-
+        return self.get_startup_jobs()[0]
 
     def get_most_recent_job(self) -> Optional[PrintJob]:
         """
         Returns the most recent PrintJob based on the date column.
         """
+        return self.get_startup_jobs()[1]
+
+    def get_startup_jobs(self) -> Tuple[Optional[PrintJob], Optional[PrintJob]]:
+        """
+        Returns (oldest in-progress job, most recent job) in one pass.
+        Only the status and date columns below the stored watermark are read; full rows
+        are fetched just for the two answers. Rows above the watermark are finished and
+        no newer than the last recorded latest job, so they can't change either answer.
+        """
         ws = self._connect()
-        rows = ws.get_all_values()
+        start = self._load_watermark()
+        tail = self._read(ws.get, f"B{start}:C")
+        if not tail and start > 1:
+            # Sheet shrank under the watermark; rescan from the top
+            start = 1
+            tail = self._read(ws.get, "B1:C")
 
-        if not rows:
-            return None
+        oldest = latest = None  # (date, row number)
+        first_printing = None   # lowest row of any in-progress job; rows aren't in date order
+        for i, row in enumerate(tail, start=start):
+            if len(row) < 2:
+                continue
+            try:
+                date = datetime.strptime(row[1].strip(), DATE_FORMAT)
+            except Exception:
+                continue
+            if row[0].strip().lower() == "printing":
+                first_printing = i if first_printing is None else first_printing
+                if oldest is None or date < oldest[0]:
+                    oldest = (date, i)
+            if latest is None or date > latest[0]:
+                latest = (date, i)
 
-        jobs = [self.row_to_printjob(r) for r in rows if len(r) >= 3 and r[2].strip()]
+        if latest is None:
+            return None, None
 
-        if not jobs:
-            return None
+        wanted = sorted({i for _, i in filter(None, (oldest, latest))})
+        fetched = self._read(ws.batch_get, [f"A{i}:H{i}" for i in wanted])
+        jobs = {
+            i: self.row_to_printjob((rows[0] + [""] * 8)[:8])
+            for i, rows in zip(wanted, fetched) if rows
+        }
+
+        # Every in-progress row must stay below the watermark, not just the oldest-by-date one
+        self._save_watermark(min(latest[1], first_printing or latest[1]))
+        print(f"[SheetClient] Startup scan read {len(tail)} rows from row {start} of {self.worksheet_name}")
+        return (jobs.get(oldest[1]) if oldest else None), jobs.get(latest[1])
 
-        return max(jobs, key=lambda j: j.date)
+    def _watermark_path(self) -> str:
+        return WATERMARK_PATH.format(self.worksheet_name.replace(" ", "_"))
+
+    def _load_watermark(self) -> int:
+        try:
+            with open(self._watermark_path()) as f:
+                return max(1, int(f.read().strip()))
+        except (OSError, ValueError):
+            return 1
+
+    def _save_watermark(self, row: int):
+        with open(self._watermark_path(), "w") as f:
+            f.write(str(row))
+
+    def reset_watermark(self):
+        """Forget the startup watermark, e.g. after rows were moved or deleted."""
+        if os.path.exists(self._watermark_path()):
+            os.remove(self._watermark_path())
 
     def row_to_printjob(self, row: List[str]) -> PrintJob:
         """
@@ -127,7 +557,7 @@ class SheetClient:
         return PrintJob(
             name=row[0],
             status=row[1],
-            date=datetime.strptime(row[2], "%m/%d/%Y %H:%M"),
+            date=datetime.strptime(row[2], DATE_FORMAT),
             duration=float(row[3]) if row[3] else 0.0,
             machine=row[4],
             weight=float(row[5]) if row[5] else 0.0,
@@ -148,17 +578,96 @@ class SheetClient:
                 row_data.get("Completion", ""),
                 row_data.get("Time", "")
             ]
-            ws.update(f'A{row_number}:D{row_number}', [values])
+            if not self._row_changed(row_number, values):
+                return
+            self._write(ws.update, f'A{row_number}:D{row_number}', [values])
+            self._row_hashes[row_number] = self._content_hash(values)
             print(f"[SheetClient] Row {row_number} updated: {values}")
         except Exception as e:
             print(f"[SheetClient Error] Failed to update row {row_number}: {e}")
 
+    def set_mfa_display_board(self, rows: List[dict]):
+        """
+        Writes every printer row of the mfa display (A1:D{n}) and the timestamp cell as one batch update,
+        so the kiosk never reads a half-updated board and cells beside it are left alone. If no row changed, only the timestamp is
+        refreshed, and at most every DISPLAY_HEARTBEAT seconds, so an idle board still shows it's alive.
+        """
+        values = [
+            [
+                row_data.get("Printer", ""),
+                row_data.get("Status", ""),
+                row_data.get("Completion", ""),
+                row_data.get("Time", "")
+            ]
+            for row_data in rows
+        ]
+        hashes = [self._content_hash(v) for v in values]
+        unchanged = all(self._row_hashes.get(i) == h for i, h in enumerate(hashes, start=1))
+        if unchanged and time.monotonic() - self._board_written_at < DISPLAY_HEARTBEAT:
+            metrics.inc("sheets.writes_suppressed")
+            return
+
+        updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if unchanged:
+            try:
+                self._write(self._connect().update, f"{DISPLAY_TIMESTAMP_COLUMN}1", [[updated]])
+                metrics.inc("sheets.writes_sent")
+                self._board_written_at = time.monotonic()
+            except Exception as e:
+                print(f"[SheetClient Error] Failed to refresh display timestamp: {e}")
+            return
+
+        try:
+            self._write(self._connect().batch_update, [
+                {"range": f"A1:D{len(values)}", "values": values},
+                {"range": f"{DISPLAY_TIMESTAMP_COLUMN}1", "values": [[updated]]},
+            ])
+            metrics.inc("sheets.writes_sent")
+            self._row_hashes.update(enumerate(hashes, start=1))
+            self._board_written_at = time.monotonic()
+            print(f"[SheetClient] Display board updated at {updated}: {len(values)} rows")
+        except Exception as e:
+            print(f"[SheetClient Error] Failed to update display board: {e}")
+
+    def replace_table(self, rows: List[list]):
+        """
+        Overwrites the worksheet from A1 with `rows` in a single update, blanking any rows
+        left over from a longer previous table. Nothing is sent if the table is unchanged.
+        """
+        table_hash = hash(tuple(self._content_hash(r) for r in rows))
+        if table_hash == self._table_hash:
+            metrics.inc("sheets.writes_suppressed")
+            return
+
+        ws = self._connect()
+        if self._table_hash is None:
+            # First replace in this process: the sheet may still hold a longer table from the last run
+            self._row_count = len(self._read(ws.get_all_values))
+        width = max((len(r) for r in rows), default=1)
+        height = max(len(rows), self._row_count)
+        grid = [list(r) + [""] * (width - len(r)) for r in rows]
+        grid += [[""] * width for _ in range(height - len(rows))]
+        last_col = chr(ord("A") + width - 1)
+        self._write(ws.update, f"A1:{last_col}{height}", grid)
+        metrics.inc("sheets.writes_sent")
+        self._table_hash = table_hash
+        self._row_count = len(rows)
+
+    def get_mfa_display_version(self) -> Optional[str]:
+        """
+        The board's last-written timestamp (F1), set by set_mfa_display_board on every change
+        and at least every DISPLAY_HEARTBEAT seconds. A one-cell read, so pollers can skip
+        the full range when it hasn't moved.
+        """
+        data = self._read(self._connect().get, f"{DISPLAY_TIMESTAMP_COLUMN}1")
+        return data[0][0] if data and data[0] else None
+
     def get_mfa_display_info(self):
         """
         Expects columns A: Printer, B: Status, C: Completion, D: Time.
         """
         sheet = self._connect()
-        data = sheet.get('A1:D32')
+        data = self._read(sheet.get, 'A1:D32')
 
         results = []
         for row in data:
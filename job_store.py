@@ -20,6 +20,12 @@ class PrintJob:
         d["date"] = self.date.isoformat()
         return d
 
+    @classmethod
+    def from_dict(cls, d: dict) -> "PrintJob":
+        d = dict(d)
+        d["date"] = datetime.fromisoformat(d["date"])
+        return cls(**d)
+
 
 class JobStore:
     def __init__(self):
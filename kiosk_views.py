@@ -0,0 +1,112 @@
+"""
+Keyed kiosk views shared by mfa_ui.py and mfa_imap_ui.py.
+Each printer and each notification gets one component that is updated in place when its values
+change; only components that appear or disappear are created or deleted.
+"""
+import threading
+from datetime import timezone
+from nicegui import ui
+
+
+class PrinterCard:
+    def __init__(self, printer: dict):
+        with ui.column().classes('items-center') as self.element:
+            self.name = ui.label(printer.get('printer', 'Unknown')).classes('text-lg font-semibold')
+            self.progress = ui.circular_progress(value=0, show_value=True)
+            self.detail = ui.label('').classes('text-sm text-gray-400')
+        self.shown = None
+        self.update(printer)
+
+    def update(self, printer: dict):
+        status = printer.get('status', 'Unknown')
+        completion = printer.get('completion')
+        label_text = printer.get('time_left', 'Unknown') if status == "Printing" else status
+
+        color = 'primary'
+        if status.lower() == 'success':
+            color = 'green'
+        elif status.lower() == 'printing':
+            color = 'orange'
+
+        shown = (completion, label_text, color)
+        if shown == self.shown:
+            return
+        self.progress.set_value(completion if completion is not None else 0)
+        self.progress.props(f'color={color}')
+        self.detail.set_text(str(label_text))
+        self.shown = shown
+
+
+class PrinterBoard:
+    """Top row with a column per printer, keyed by printer name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cards = {}
+        ui.label('Printer Status')
+        self.empty = ui.label('No printers')
+        self.row = ui.row().classes('w-full justify-around p-4')
+
+    def update(self, board: list):
+        with self._lock:
+            names = {p.get('printer', 'Unknown') for p in board}
+            for name in [n for n in self.cards if n not in names]:
+                self.cards.pop(name).element.delete()
+            for printer in board:
+                name = printer.get('printer', 'Unknown')
+                if name in self.cards:
+                    self.cards[name].update(printer)
+                else:
+                    with self.row:
+                        self.cards[name] = PrinterCard(printer)
+            self.empty.set_visibility(not self.cards)
+
+
+class NotificationCard:
+    def __init__(self, note):
+        with ui.card().props('flat bordered').classes('p-2 m-1 w-full') as self.element:
+            with ui.row().classes('justify-between w-full'):
+                ui.label(f"Code: {note.code}")
+                with ui.row():
+                    ui.label("Time:")
+                    self.time = ui.label(local_time(note))
+                ui.label(f"ID: {note.id}")
+        self.color = None
+        self.update(note)
+
+    def update(self, note):
+        if note.color != self.color:
+            self.time.style(f"color:{note.color}")
+            self.color = note.color
+
+
+class NotificationList:
+    """MFA codes, newest first, keyed by notification id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cards = {}
+        ui.separator()
+        ui.label('MFA Codes')
+        self.empty = ui.label('No notifications')
+        self.column = ui.column().classes('w-full p-4')
+
+    def update(self, notes: list):
+        with self._lock:
+            ids = {n.id for n in notes}
+            for note_id in [i for i in self.cards if i not in ids]:
+                self.cards.pop(note_id).element.delete()
+            for note in notes:  # oldest first, so each new card lands on top
+                if note.id in self.cards:
+                    self.cards[note.id].update(note)
+                else:
+                    with self.column:
+                        card = self.cards[note.id] = NotificationCard(note)
+                    card.element.move(target_index=0)
+            self.empty.set_visibility(not self.cards)
+
+
+def local_time(note) -> str:
+    # Naive times are UTC
+    when = note.time if note.time.tzinfo else note.time.replace(tzinfo=timezone.utc)
+    return when.astimezone().strftime("%I:%M %p").lstrip("0")
@@ -0,0 +1,215 @@
+"""
+In-process stand-in for the slice of gspread that SheetClient uses, backed by SQLite.
+Plug it in with gspread_updater.set_session(SheetSession(spreadsheet=LocalSpreadsheet(...))).
+
+Spreadsheet: worksheet, add_worksheet, values_batch_get, batch_update (deleteDimension)
+Worksheet:   get_all_values, get, batch_get, update, batch_update, append_rows, id, title
+"""
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+import gspread
+
+
+class SimulatedQuotaError(Exception):
+    """Looks like a Sheets 429 to rate_limit.is_rate_limited."""
+    code = 429
+
+
+def parse_a1(a1: str):
+    """
+    Split an A1 range into (sheet or None, first row, first col, last row or None, last col or None).
+    Rows and columns are 1-based; open-ended ranges like "B5:C" or "A:H" leave the last row as None.
+    """
+    sheet = None
+    if "!" in a1:
+        sheet, a1 = a1.rsplit("!", 1)
+        sheet = sheet.strip("'")
+    start, _, end = a1.partition(":")
+    end = end or start
+
+    def cell(ref):
+        m = re.fullmatch(r"([A-Z]*)(\d*)", ref.upper())
+        col = 0
+        for ch in m.group(1):
+            col = col * 26 + ord(ch) - 64
+        return (int(m.group(2)) if m.group(2) else None), (col or None)
+
+    r1, c1 = cell(start)
+    r2, c2 = cell(end)
+    return sheet, r1 or 1, c1 or 1, r2, c2
+
+
+class LocalSpreadsheet:
+    def __init__(self, path: str = ":memory:", latency: float = 0.0, error_rate: float = 0.0,
+                 quota_per_minute: int = None):
+        """
+        latency: seconds slept per API call. error_rate: chance a call fails with a 429.
+        quota_per_minute: per-minute read and write request limits, as Google enforces them.
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.quota_per_minute = quota_per_minute
+        self.calls = {"read": 0, "write": 0}
+        self._recent = {"read": deque(), "write": deque()}
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS sheets (id INTEGER PRIMARY KEY, title TEXT UNIQUE)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rows (sheet INTEGER, idx INTEGER, data TEXT, PRIMARY KEY (sheet, idx))"
+        )
+        self._db.commit()
+
+    def _api(self, kind: str):
+        """Account for one API call: latency, quota window and random failures."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[kind] += 1
+            if self.quota_per_minute is not None:
+                now = time.monotonic()
+                window = self._recent[kind]
+                while window and now - window[0] > 60:
+                    window.popleft()
+                if len(window) >= self.quota_per_minute:
+                    raise SimulatedQuotaError(f"Quota exceeded for {kind} requests per minute")
+                window.append(now)
+        if self.error_rate and random.random() < self.error_rate:
+            raise SimulatedQuotaError("RESOURCE_EXHAUSTED (simulated)")
+
+    def worksheet(self, title: str) -> "LocalWorksheet":
+        self._api("read")
+        row = self._db.execute("SELECT id FROM sheets WHERE title = ?", (title,)).fetchone()
+        if row is None:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return LocalWorksheet(self, row[0], title)
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26) -> "LocalWorksheet":
+        self._api("write")
+        with self._lock:
+            cur = self._db.execute("INSERT INTO sheets (title) VALUES (?)", (title,))
+            self._db.commit()
+        return LocalWorksheet(self, cur.lastrowid, title)
+
+    def values_batch_get(self, ranges):
+        self._api("read")
+        result = []
+        for a1 in ranges:
+            sheet, *bounds = parse_a1(a1)
+            ws = self._sheet_by_title(sheet)
+            result.append({"range": a1, "values": ws._read_range(*bounds)})
+        return {"valueRanges": result}
+
+    def batch_update(self, body: dict):
+        self._api("write")
+        with self._lock:
+            for request in body.get("requests", []):
+                rng = request["deleteDimension"]["range"]
+                n = rng["endIndex"] - rng["startIndex"]
+                # Rows are 1-based here, the request is 0-based and end-exclusive
+                self._db.execute("DELETE FROM rows WHERE sheet = ? AND idx > ? AND idx <= ?",
+                                 (rng["sheetId"], rng["startIndex"], rng["endIndex"]))
+                # Two-step shift so the (sheet, idx) key never collides mid-update
+                self._db.execute("UPDATE rows SET idx = -(idx - ?) WHERE sheet = ? AND idx > ?",
+                                 (n, rng["sheetId"], rng["endIndex"]))
+                self._db.execute("UPDATE rows SET idx = -idx WHERE sheet = ? AND idx < 0", (rng["sheetId"],))
+            self._db.commit()
+        return {}
+
+    def _sheet_by_title(self, title: str) -> "LocalWorksheet":
+        row = self._db.execute("SELECT id FROM sheets WHERE title = ?", (title,)).fetchone()
+        if row is None:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return LocalWorksheet(self, row[0], title)
+
+
+class LocalWorksheet:
+    def __init__(self, spreadsheet: LocalSpreadsheet, sheet_id: int, title: str):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self._db = spreadsheet._db
+        self._lock = spreadsheet._lock
+
+    # --- reads ---
+
+    def get_all_values(self):
+        self.spreadsheet._api("read")
+        rows = self._read_range(1, 1, None, None)
+        width = max((len(r) for r in rows), default=0)
+        return [r + [""] * (width - len(r)) for r in rows]
+
+    def get(self, a1: str):
+        self.spreadsheet._api("read")
+        return self._read_range(*parse_a1(a1)[1:])
+
+    def batch_get(self, ranges):
+        self.spreadsheet._api("read")
+        return [self._read_range(*parse_a1(a1)[1:]) for a1 in ranges]
+
+    def _read_range(self, r1, c1, r2, c2):
+        """Rows r1..r2 and columns c1..c2, trimmed of trailing blanks the way the Sheets API returns them."""
+        with self._lock:
+            last = r2 if r2 is not None else self._last_row()
+            found = dict(self._db.execute(
+                "SELECT idx, data FROM rows WHERE sheet = ? AND idx BETWEEN ? AND ?", (self.id, r1, last)
+            ).fetchall())
+        out = []
+        for i in range(r1, last + 1):
+            row = json.loads(found[i]) if i in found else []
+            row = row[c1 - 1:c2] if c2 is not None else row[c1 - 1:]
+            while row and row[-1] == "":
+                row.pop()
+            out.append(row)
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def _last_row(self) -> int:
+        return self._db.execute("SELECT COALESCE(MAX(idx), 0) FROM rows WHERE sheet = ?", (self.id,)).fetchone()[0]
+
+    # --- writes ---
+
+    def update(self, a1, values=None, **kwargs):
+        # gspread 6 accepts (range, values) as well as (values, range)
+        if isinstance(a1, list):
+            a1, values = values, a1
+        self.spreadsheet._api("write")
+        self._write(a1, values)
+        return {"updatedRange": f"'{self.title}'!{a1}"}
+
+    def batch_update(self, data, **kwargs):
+        self.spreadsheet._api("write")
+        for item in data:
+            self._write(item["range"], item["values"])
+        return {}
+
+    def append_rows(self, values, **kwargs):
+        self.spreadsheet._api("write")
+        with self._lock:
+            first = self._last_row() + 1
+            self._write(f"A{first}", values)
+        last = first + len(values) - 1
+        return {"updates": {"updatedRange": f"'{self.title}'!A{first}:H{last}"}}
+
+    def _write(self, a1, values):
+        _, r1, c1, _, _ = parse_a1(a1)
+        with self._lock:
+            for offset, new in enumerate(values):
+                i = r1 + offset
+                found = self._db.execute(
+                    "SELECT data FROM rows WHERE sheet = ? AND idx = ?", (self.id, i)
+                ).fetchone()
+                row = json.loads(found[0]) if found else []
+                row += [""] * (c1 - 1 + len(new) - len(row))
+                # Store what Sheets would render back: strings, with integral floats shown as ints
+                row[c1 - 1:c1 - 1 + len(new)] = [
+                    str(int(v)) if isinstance(v, float) and v.is_integer() else str(v) for v in new
+                ]
+                self._db.execute("INSERT OR REPLACE INTO rows (sheet, idx, data) VALUES (?, ?, ?)",
+                                 (self.id, i, json.dumps(row)))
+            self._db.commit()
@@ -0,0 +1,48 @@
+import json
+import os
+import threading
+import time
+
+METRICS_PATH = "metrics.json"
+EXPORT_INTERVAL = 15
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+
+
+def inc(name: str, n: int = 1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def set_gauge(name: str, value):
+    with _lock:
+        _gauges[name] = value
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {"time": time.time(), "counters": dict(_counters), "gauges": dict(_gauges)}
+
+
+def write(path: str = METRICS_PATH):
+    """Write the current snapshot as JSON, replacing the file atomically."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot(), f, indent=2, sort_keys=True)
+    # rename is atomic, so readers never see a half-written file
+    os.replace(tmp, path)
+
+
+def start_exporter(path: str = METRICS_PATH, interval: float = EXPORT_INTERVAL):
+    """Background thread: export the metrics to `path` every `interval` seconds."""
+    def loop():
+        while True:
+            try:
+                write(path)
+            except Exception as e:
+                print(f"[Metrics] Export failed: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=loop, daemon=True).start()
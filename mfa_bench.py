@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark MFA code extraction: the original full-RFC822 pipeline against mfa_code's partial fetch.
+Point it at a directory of saved Bambu Lab emails (.eml, e.g. "Download message" from webmail);
+no corpus ships with the repo. --synthetic generates look-alike messages for a quick smoke run.
+
+    python mfa_bench.py ~/bambu_emails --repeat 20
+    python mfa_bench.py --synthetic 200
+"""
+import argparse
+import email
+import email.policy
+import glob
+import os
+import random
+import re
+import time
+from email.message import EmailMessage
+from html.parser import HTMLParser
+import mfa_code
+
+
+class StripHTML(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.result = []
+
+    def handle_data(self, data):
+        self.result.append(data)
+
+
+def legacy_extract(raw: bytes):
+    """The original dosync2 parsing: whole message to string, HTMLParser strip, unanchored regexes."""
+    message = email.message_from_bytes(raw).as_string()
+    stripper = StripHTML()
+    stripper.feed(message)
+    message = " ".join("".join(stripper.result).split())
+    try:
+        re.search('Welcome to Bambu Lab([\\s\\S]*)Bambu Lab', message).group()
+        code_str = re.search("Your verification code is:\\s+\\d\\d\\d\\d\\d\\d", message).group()
+        return re.search("\\d\\d\\d\\d\\d\\d", code_str).group()
+    except AttributeError:
+        return None
+
+
+def partial_pieces(raw: bytes):
+    """What the server returns for mfa_code.FETCH_ITEMS: selected headers, part 1 MIME headers, part 1 head."""
+    msg = email.message_from_bytes(raw, policy=email.policy.compat32)
+    wanted = ("Date", "Delivery-Date", "Content-Type", "Content-Transfer-Encoding")
+    headers = "".join(f"{k}: {v}\r\n" for k, v in msg.items() if k.title() in wanted).encode()
+    part = msg.get_payload(0) if msg.is_multipart() else msg
+    mime = "".join(f"{k}: {v}\r\n" for k, v in part.items()).encode() if msg.is_multipart() else b""
+    payload = part.get_payload(decode=False)
+    body = payload.encode("utf-8", errors="replace") if isinstance(payload, str) else b""
+    return headers, mime, body[:mfa_code.PEEK_BYTES]
+
+
+def synthetic_corpus(count: int):
+    """Bambu-style verification emails: a multipart/alternative with a long, table-heavy HTML part."""
+    corpus = []
+    for _ in range(count):
+        code = f"{random.randrange(10 ** 6):06d}"
+        filler = "".join(f"<tr><td style='padding:4px'>Bambu Lab news item {i}</td></tr>" for i in range(400))
+        msg = EmailMessage()
+        msg["From"] = "Bambu Lab <no-reply@bambulab.com>"
+        msg["Subject"] = "[Bambu Lab] Verification code"
+        msg["Date"] = email.utils.formatdate(localtime=True)
+        msg.set_content(f"Welcome to Bambu Lab\nYour verification code is: {code}\n")
+        msg.add_alternative(
+            f"<html><body><p>Welcome to Bambu Lab</p><p>Your verification code is:</p>"
+            f"<h2>{code}</h2><table>{filler}</table><p>Bambu Lab</p></body></html>",
+            subtype="html",
+        )
+        corpus.append(("synthetic", msg.as_bytes()))
+    return corpus
+
+
+def load_corpus(path: str):
+    corpus = []
+    for name in sorted(glob.glob(os.path.join(path, "*.eml"))):
+        with open(name, "rb") as f:
+            corpus.append((name, f.read()))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="directory of .eml files")
+    parser.add_argument("--synthetic", type=int, default=0, help="generate this many messages instead")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.synthetic) if args.synthetic else load_corpus(args.corpus or ".")
+    if not corpus:
+        parser.error("no .eml files found; pass a corpus directory or --synthetic N")
+    pieces = [partial_pieces(raw) for _, raw in corpus]
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        legacy = [legacy_extract(raw) for _, raw in corpus]
+    legacy_s = (time.perf_counter() - t0) / (args.repeat * len(corpus))
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        lean = [mfa_code.extract(*p) for p in pieces]
+    lean_s = (time.perf_counter() - t0) / (args.repeat * len(corpus))
+
+    full_bytes = sum(len(raw) for _, raw in corpus)
+    partial_bytes = sum(sum(map(len, p)) for p in pieces)
+    agree = sum((l or None) == (n.code if n else None) for l, n in zip(legacy, lean))
+    print(f"messages: {len(corpus)}  codes found: legacy={sum(bool(c) for c in legacy)} lean={sum(bool(c) for c in lean)}"
+          f"  agree={agree}/{len(corpus)}")
+    print(f"  legacy: {legacy_s * 1e3:8.3f} ms/msg  {full_bytes / len(corpus):10.0f} bytes fetched/msg")
+    print(f"    lean: {lean_s * 1e3:8.3f} ms/msg  {partial_bytes / len(corpus):10.0f} bytes fetched/msg")
+    for (name, _), l, n in zip(corpus, legacy, lean):
+        if (l or None) != (n.code if n else None):
+            print(f"  mismatch {name}: legacy={l} lean={n.code if n else None}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Lean MFA code extraction for Bambu Lab emails.
+
+Instead of downloading the whole RFC822 message, the IMAP fetch asks for a few headers,
+the MIME headers of the first body part and only its first PEEK_BYTES bytes. The code is then
+found with precompiled patterns that run in linear time over the decoded text.
+"""
+import base64
+import binascii
+import email
+import html
+import quopri
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+PEEK_BYTES = 8192  # the code sits near the top of the first part
+BODY_CHARS = 200   # text kept as the notification body
+FETCH_ITEMS = (
+    "(BODY.PEEK[HEADER.FIELDS (DATE DELIVERY-DATE CONTENT-TYPE CONTENT-TRANSFER-ENCODING)]"
+    f" BODY.PEEK[1.MIME] BODY.PEEK[1]<0.{PEEK_BYTES}>)"
+)
+
+CODE_RE = re.compile(r"verification code is:?\s*(\d{6})(?!\d)", re.IGNORECASE)
+ANY_CODE_RE = re.compile(r"(?<!\d)(\d{6})(?!\d)")
+TAG_RE = re.compile(r"<[^<>]*>")
+WS_RE = re.compile(r"\s+")
+HEADER_RE = re.compile(rb"^([A-Za-z-]+):[ \t]*(.*(?:\r?\n[ \t].*)*)", re.MULTILINE)
+CHARSET_RE = re.compile(r'charset="?([\w.-]+)', re.IGNORECASE)
+
+
+@dataclass
+class MfaCode:
+    code: str
+    time: datetime
+    body: str
+
+
+def find_code(text: str, strict: bool = True) -> Optional[str]:
+    """The 6-digit code after "verification code is"; with strict=False, any standalone 6 digits."""
+    m = CODE_RE.search(text)
+    if m is None and not strict:
+        m = ANY_CODE_RE.search(text)
+    return m.group(1) if m else None
+
+
+def html_to_text(raw: str) -> str:
+    """Drop tags and collapse whitespace; one linear pass per pattern."""
+    return WS_RE.sub(" ", html.unescape(TAG_RE.sub(" ", raw))).strip()
+
+
+def parse_headers(block: bytes) -> dict:
+    """Header block -> {lowercased name: unfolded value}."""
+    return {
+        name.decode().lower(): WS_RE.sub(" ", value.decode("latin-1")).strip()
+        for name, value in HEADER_RE.findall(block or b"")
+    }
+
+
+def decode_part(mime: dict, payload: bytes) -> str:
+    """Undo the part's transfer encoding; tolerant of payloads cut off by a partial fetch."""
+    encoding = mime.get("content-transfer-encoding", "").lower()
+    if encoding == "base64":
+        compact = b"".join(payload.split())
+        try:
+            payload = base64.b64decode(compact[:len(compact) - len(compact) % 4])
+        except (binascii.Error, ValueError):
+            payload = b""
+    elif encoding == "quoted-printable":
+        payload = quopri.decodestring(payload)
+    m = CHARSET_RE.search(mime.get("content-type", ""))
+    try:
+        return payload.decode(m.group(1) if m else "utf-8", errors="replace")
+    except LookupError:
+        return payload.decode("utf-8", errors="replace")
+
+
+def message_time(headers: dict) -> datetime:
+    for name in ("delivery-date", "date"):
+        if headers.get(name):
+            try:
+                return parsedate_to_datetime(headers[name])
+            except (TypeError, ValueError):
+                continue
+    return datetime.now(timezone.utc)
+
+
+def part_headers(top: dict, mime: bytes) -> dict:
+    """MIME headers of the first part; a single-part message only has the top-level ones."""
+    part = parse_headers(mime)
+    if not part.get("content-type") or top.get("content-type", "").lower().startswith("text/"):
+        return top
+    return part
+
+
+def extract(headers: bytes, mime: bytes, body: bytes) -> Optional[MfaCode]:
+    """Extract from the three pieces of a partial fetch. None if no code was found."""
+    top = parse_headers(headers)
+    part = part_headers(top, mime)
+    text = decode_part(part, body)
+    if "html" in part.get("content-type", "").lower():
+        text = html_to_text(text)
+    else:
+        text = WS_RE.sub(" ", text).strip()
+
+    code = find_code(text)
+    if code is None:
+        return None
+    start = max(text.find("Welcome to Bambu Lab"), 0)
+    return MfaCode(code=code, time=message_time(top), body=text[start:start + BODY_CHARS])
+
+
+def fetch_code(conn, uid) -> Optional[MfaCode]:
+    """
+    Partial fetch of one message by UID. Only when the first part is itself multipart
+    (or came back empty) is the whole message downloaded.
+    """
+    resp_code, data = conn.uid('FETCH', str(uid), FETCH_ITEMS)
+    headers, mime, body = split_fetch(data)
+    part = part_headers(parse_headers(headers), mime)
+    if body and not part.get("content-type", "").lower().startswith("multipart/"):
+        return extract(headers, mime, body)
+
+    resp_code, data = conn.uid('FETCH', str(uid), '(BODY.PEEK[])')
+    raw = next((item[1] for item in data if isinstance(item, tuple)), b"")
+    return extract_message(raw)
+
+
+def split_fetch(data) -> tuple:
+    """Sort an imaplib FETCH response for FETCH_ITEMS into (headers, mime, body) bytes."""
+    headers = mime = body = b""
+    for item in data:
+        if not isinstance(item, tuple):
+            continue
+        spec, literal = item[0].upper(), item[1] or b""
+        if b"HEADER.FIELDS" in spec:
+            headers = literal
+        elif b"BODY[1.MIME]" in spec:
+            mime = literal
+        elif b"BODY[1]" in spec:
+            body = literal
+    return headers, mime, body
+
+
+def extract_message(raw: bytes) -> Optional[MfaCode]:
+    """Full-message path, for when the first part is nested or the partial fetch came back empty."""
+    msg = email.message_from_bytes(raw)
+    for part in msg.walk():
+        if part.get_content_maintype() != "text":
+            continue
+        headers = "".join(f"{k}: {v}\r\n" for k, v in msg.items()).encode("utf-8", errors="replace")
+        mime = "".join(f"{k}: {v}\r\n" for k, v in part.items()).encode("utf-8", errors="replace")
+        found = extract(headers, mime, part.get_payload(decode=False).encode("utf-8", errors="replace"))
+        if found:
+            return found
+    return None
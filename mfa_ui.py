@@ -1,4 +1,3 @@
-from datetime import datetime, timezone
 import math
 import multiprocessing
 from multiprocessing import context
@@ -8,139 +7,124 @@ import time
 from nicegui import ui
 import email_service
 from gspread_updater import SheetClient
-from notification_store import FixedQueue
+import rate_limit as rl
+import status_channel
+from notification_store import apply_diff
+from broadcast import BroadcastHub
+import kiosk_views
 
 sheet_client = None
 printer_data = None  # global latest snapshot from the poller
+POLL_INTERVAL = 5  # seconds; unchanged polls cost one single-cell read
+MIRROR_FRESH = 120  # seconds; while the monitor is publishing locally, Sheets is left alone
+printer_lock = threading.Lock()
+last_local_update = 0.0
+notifications = []  # UI copy of the mail process's store, kept current from its diffs
+printer_hub = BroadcastHub("printers")
+notification_hub = BroadcastHub("notifications", initial=[])
 
 @ui.page('/')  # UI lives here
 def index():
 
-    shared_stack = index.shared_stack
-    inbox_q = index.inbox_q
-
-    index.printer_model = list(printer_data or [])
-
-    @ui.refreshable
-    def printers_view():
-        ui.label('Printer Status')
-        """Top row with a column per printer; updates via index.set_printers(...)"""
-        data, set_data = ui.state(index.printer_model)
-        index.set_printers = set_data  # expose setter for background thread
-
-        if not data:
-            ui.label('No printers')
-            return
-
-        with ui.row().classes('w-full justify-around p-4'):
-            for p in data:
-                print(p)
-                printer_name = p.get('printer', 'Unknown')
-                status = p.get('status', 'Unknown')
-                completion = p.get('completion', 'Unknown')
-                remaining_hr = p.get('time_left', 'Unknown')
-                label_text = status
-                if status == "Printing":
-                    label_text = remaining_hr
-
-                color = 'primary'
-                if status.lower() == 'success':
-                    color = 'green'
-                elif status.lower() == 'printing':
-                    color = 'orange'
-
-                with ui.column().classes('items-center'):
-                    ui.label(printer_name).classes('text-lg font-semibold')
-                    ui.circular_progress(
-                        value=completion,
-                        show_value=True,
-                    ).props(f'color={color}')
-                    ui.label(label_text).classes('text-sm text-gray-400')
-
-    
-
-
-    index.model = list(shared_stack)
-
-    @ui.refreshable
-    def notifications_view():
-        ui.separator()
-        ui.label('MFA Codes')
-        data, set_data = ui.state(index.model)
-        index.set_notifications = set_data
-
-        if not data:
-            ui.label('No notifications')
-            return
-        with ui.column().classes('w-full p-4'):
-            for note in reversed(data):
-                with ui.card().props('flat bordered').classes('p-2 m-1 w-full'):
-                    with ui.row().classes('justify-between w-full'):
-                        ui.label(f"Code: {note.code}")
-                        with ui.row():
-                            ui.label("Time:")
-                            local_time = note.time.replace(tzinfo=timezone.utc).astimezone().strftime("%I:%M %p").lstrip("0")
-                            ui.label(local_time).style(f"color:{note.color}")
-                        ui.label(f"ID: {note.id}")
-
-    def queue_listener():
-        """Receives full queue snapshots from MFA2 and updates state reactively."""
-        while True:
-            snapshot = inbox_q.get()
-            index.set_notifications(snapshot)
-
-    threading.Thread(target=queue_listener, daemon=True).start()
-
-    # ----- INITIAL PAINT -----
-    printers_view()
-    notifications_view()
-
-    if printer_data:
-        try:
-            index.set_printers(list(printer_data))
-        except Exception:
-            pass
+    client = ui.context.client
+
+    # One component per printer / notification, updated in place
+    printers = kiosk_views.PrinterBoard()
+    codes = kiosk_views.NotificationList()
+    printers.update(list(printer_hub.latest or []))
+    codes.update(list(notification_hub.latest))
+
+    # Subscribed only while the browser is connected; a reconnect resubscribes and replays the latest state
+    subscriptions = []
+
+    def connect():
+        disconnect()
+        subscriptions.extend([
+            printer_hub.subscribe(printers.update),
+            notification_hub.subscribe(codes.update),
+        ])
+
+    def disconnect():
+        while subscriptions:
+            subscriptions.pop()()
+
+    client.on_connect(connect)
+    client.on_disconnect(disconnect)
 
 def start_mail_process(ctx, out_q):
     email_service.main(out_q)
 
+def push_printers(board):
+    printer_hub.publish(list(board))
+
+
+def on_local_status(snapshot):
+    """Merges one printer snapshot from the monitor's local channel into the board and pushes it."""
+    global printer_data, last_local_update
+    with printer_lock:
+        board = list(printer_data or [])
+        for i, p in enumerate(board):
+            if p.get('printer') == snapshot.get('printer'):
+                board[i] = snapshot
+                break
+        else:
+            board.append(snapshot)
+        printer_data = board
+        last_local_update = time.monotonic()
+    push_printers(board)
+
+
 def poll_mfa_display():
-    """Background poller: refreshes global printer_data and pushes to UI if available."""
+    """
+    Background poller for the Sheets mirror: checks the board's version cell and only re-reads
+    and pushes when it moved. Idle while the local channel is delivering updates.
+    """
     global printer_data
+    version = None
     while True:
         try:
-            printer_data = sheet_client.get_mfa_display_info()
-            print(f"[MFA Display Update] Retrieved {len(printer_data)} entries")
-
-            if hasattr(index, 'set_printers'):
-                try:
-                    index.set_printers(list(printer_data))
-                except Exception as e:
-                    print(f"[MFA Display Push Warning] {e}")
+            if printer_data is None or time.monotonic() - last_local_update > MIRROR_FRESH:
+                latest = sheet_client.get_mfa_display_version()
+                # Boards written before the version cell existed have no version; always re-read those
+                if latest is None or latest != version or printer_data is None:
+                    board = sheet_client.get_mfa_display_info()
+                    version = latest
+                    with printer_lock:
+                        printer_data = board
+                    print(f"[MFA Display Update] Retrieved {len(board)} entries (version {version})")
+                    push_printers(board)
 
         except Exception as e:
             print(f"[MFA Display Error] {e}")
 
-        time.sleep(60)
+        time.sleep(POLL_INTERVAL)
+
+
+def notification_listener(inbox_q):
+    """Single reader of the mail process's queue: applies each diff and broadcasts the result to every page."""
+    global notifications
+    while True:
+        notifications = apply_diff(notifications, inbox_q.get())
+        notification_hub.publish(list(notifications))
+
 
 def start_background_thread():
     global sheet_client
-    sheet_client = SheetClient("device_status")
+    rl.configure("kiosk")
+    sheet_client = SheetClient("device_status", priority=rl.PRIORITY_DISPLAY)
     thread = threading.Thread(target=poll_mfa_display, daemon=True)
     thread.start()
     print("[MFA Display Thread] Started")
+    status_channel.subscribe(on_local_status)
 
 
 def main():
     multiprocessing.freeze_support()
     ctx = multiprocessing.get_context("spawn")
 
-    shared_stack = FixedQueue()
     inbox_q = ctx.Queue()
 
-    # attach to page so it can see them
-    index.shared_stack = shared_stack
-    index.inbox_q = inbox_q
+    threading.Thread(target=notification_listener, args=(inbox_q,), daemon=True).start()
 
     print("starting mail...")
     mail_proc = ctx.Process(target=start_mail_process, args=(ctx, inbox_q), daemon=True)
@@ -1,8 +1,13 @@
-import re
-from dataclasses import dataclass, field
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone, timedelta
 from email.utils import parsedate_to_datetime
 from typing import Optional
+import mfa_code
 
 @dataclass
 class Notification:
@@ -33,13 +38,8 @@ class Notification:
         snippet = msg.get("snippet", "(no snippet)")
 
         # 6-digit code extraction
-        code = None
-        m = re.search(r"\b\d{6}\b", snippet)
-        if m:
-            try:
-                code = int(m.group())
-            except ValueError:
-                pass
+        code = mfa_code.find_code(snippet, strict=False)
+        code = int(code) if code else None
 
         notif_id = msg_id or f"{time_utc.timestamp()}-{hash(subject)}"
         expires = time_utc + timedelta(seconds=lifetime)
@@ -53,27 +53,163 @@ class Notification:
             expires_at=expires,
         )
 
-class FixedQueue:
-    def __init__(self, max_size=5):
+GMAIL_COLORS = ("green", "yellow", "red")
+IMAP_COLORS = ("green", "yellow", "blue")
+
+
+def _epoch(dt: datetime) -> float:
+    # Naive times come from utcnow()
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+class NotificationStore:
+    """
+    The most recent notifications, aged in place. Over its lifetime a notification steps through
+    `colors` in equal thirds (or however many colors there are) and is dropped at expires_at.
+
+    A min-heap holds every pending color change and expiry, so one timer thread sleeps until exactly
+    the next one. Each change bumps `version`, and subscribers get a diff:
+        {"version": int, "added": [Notification], "updated": {id: color}, "removed": [id]}
+    Callbacks run on the pushing or timer thread with the store locked; keep them quick.
+    """
+
+    def __init__(self, max_size: int = 5, colors=GMAIL_COLORS, lifetime: float = 300.0):
         self.max_size = max_size
-        self.queue = []
-
-    def push(self, notification):
-        if not notification or not notification.id:
-            return
-        if any(n.id == notification.id for n in self.queue):
-            return
-        if len(self.queue) >= self.max_size:
-            self.queue.pop(0)
-        self.queue.append(notification)
-
-    def pop(self, index=0):
-        if self.queue:
-            return self.queue.pop(index)
-        return None
+        self.colors = tuple(colors)
+        self.lifetime = lifetime  # seconds, for notifications pushed without expires_at
+        self.version = 0
+        self._items = deque()  # oldest first
+        self._by_id = {}
+        self._deadlines = []   # (when, seq, id, step, note); step == len(colors) means expiry
+        self._seq = itertools.count()
+        self._cond = threading.Condition(threading.RLock())
+        self._subscribers = []
+        self._timer = None
+
+    def push(self, note: Notification) -> bool:
+        """Add a notification. False if it has no id, is already present or has already expired."""
+        if not note or not note.id:
+            return False
+        if note.expires_at is None:
+            note.expires_at = note.time + timedelta(seconds=self.lifetime)
+        start, end = _epoch(note.time), _epoch(note.expires_at)
+        now = time.time()
+
+        with self._cond:
+            if note.id in self._by_id or now >= end:
+                return False
+            removed = []
+            if len(self._items) >= self.max_size:
+                removed.append(self._items.popleft().id)
+                del self._by_id[removed[0]]
+
+            span = max(end - start, 1e-6)
+            step = max(min(int((now - start) / span * len(self.colors)), len(self.colors) - 1), 0)
+            note.color = self.colors[step]
+            for later in range(step + 1, len(self.colors) + 1):
+                when = start + span * later / len(self.colors)
+                heapq.heappush(self._deadlines, (when, next(self._seq), note.id, later, note))
+
+            self._items.append(note)
+            self._by_id[note.id] = note
+            self._publish(added=[note], removed=removed)
+            self._ensure_timer()
+            self._cond.notify()
+        return True
+
+    def remove(self, note_id) -> bool:
+        with self._cond:
+            note = self._by_id.pop(note_id, None)
+            if note is None:
+                return False
+            self._items.remove(note)
+            self._publish(removed=[note_id])
+        return True
+
+    def items(self) -> list:
+        with self._cond:
+            return list(self._items)
+
+    def snapshot(self):
+        """(version, notifications) taken atomically, for a subscriber that needs a starting point."""
+        with self._cond:
+            return self.version, list(self._items)
+
+    def subscribe(self, callback, initial: bool = False):
+        """
+        callback(diff) on every change; with initial=True it first gets the current snapshot,
+        taken under the same lock so no change falls in between. Returns a function that unsubscribes.
+        """
+        with self._cond:
+            if initial:
+                callback({"version": self.version, "snapshot": list(self._items)})
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._cond:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
 
     def __len__(self):
-        return len(self.queue)
+        return len(self._items)
 
     def __iter__(self):
-        return iter(self.queue)
\ No newline at end of file
+        return iter(self.items())
+
+    def _publish(self, added=(), updated=None, removed=()):
+        self.version += 1
+        diff = {"version": self.version, "added": list(added), "updated": dict(updated or {}), "removed": list(removed)}
+        for callback in list(self._subscribers):
+            try:
+                callback(diff)
+            except Exception as e:
+                print(f"[NotificationStore] Subscriber failed: {e}")
+
+    def _ensure_timer(self):
+        if self._timer is None:
+            self._timer = threading.Thread(target=self._run, daemon=True)
+            self._timer.start()
+
+    def _run(self):
+        """Sleep until the earliest deadline, apply everything due, repeat."""
+        with self._cond:
+            while True:
+                if not self._deadlines:
+                    self._cond.wait()
+                    continue
+                delay = self._deadlines[0][0] - time.time()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                updated, removed = {}, []
+                now = time.time()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, _, note_id, step, scheduled = heapq.heappop(self._deadlines)
+                    note = self._by_id.get(note_id)
+                    if note is not scheduled:
+                        continue  # evicted or removed since it was scheduled, or the id was pushed again
+                    if step >= len(self.colors):
+                        del self._by_id[note_id]
+                        self._items.remove(note)
+                        updated.pop(note_id, None)
+                        removed.append(note_id)
+                    elif note.color != self.colors[step]:
+                        note.color = self.colors[step]
+                        updated[note_id] = note.color
+                if updated or removed:
+                    self._publish(updated=updated, removed=removed)
+
+
+def apply_diff(notes: list, diff: dict) -> list:
+    """A subscriber's copy of the store after one diff (or snapshot) message, oldest first."""
+    if "snapshot" in diff:
+        return list(diff["snapshot"])
+    removed = set(diff["removed"])
+    # Recolored notes are copies, so lists already handed out keep comparing unequal to the new one
+    notes = [
+        replace(n, color=diff["updated"][n.id]) if n.id in diff["updated"] else n
+        for n in notes if n.id not in removed
+    ]
+    return notes + diff["added"]
@@ -1,12 +1,17 @@
-import os
+import subprocess
 from lxml import etree
 import xml.etree.ElementTree as ET
 import re
 from datetime import datetime
+import deadline as dl
+
+def dump_view():
+    """Dump the current UI hierarchy on the device and pull it to view.xml."""
+    dl.run(["adb", "shell", "uiautomator", "dump", "/sdcard/view.xml"])
+    dl.run(["adb", "pull", "/sdcard/view.xml"], stdout=subprocess.DEVNULL)
 
 def parse_screen(long_clickable_only: bool = True):
-    os.system("adb shell uiautomator dump /sdcard/view.xml")
-    os.system("adb pull /sdcard/view.xml >/dev/null")
+    dump_view()
     # For debugging, to see the raw XML:
     # os.system("adb shell cat /sdcard/view.xml")
 
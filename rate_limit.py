@@ -0,0 +1,135 @@
+import random
+import threading
+import time
+import metrics
+
+# Request priorities: lower numbers are served first when tokens run short
+PRIORITY_DISPLAY = 0     # kiosk board writes/reads
+PRIORITY_JOBS = 1        # job rows
+PRIORITY_BACKGROUND = 2  # analytics, backfill
+
+# Fraction of a bucket each priority must leave untouched for the ones above it
+RESERVE = {PRIORITY_DISPLAY: 0.0, PRIORITY_JOBS: 0.2, PRIORITY_BACKGROUND: 0.5}
+
+MAX_RETRIES = 5
+BACKOFF_INITIAL = 2
+BACKOFF_MAX = 64
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second up to `capacity`.
+    A 429 from the API empties the bucket and pauses it for the backoff period.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: float):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        if now > self._paused_until:
+            self._tokens = min(self.capacity, self._tokens + (now - max(self._stamp, self._paused_until)) * self.rate)
+        self._stamp = now
+
+    def acquire(self, cost: float = 1, priority: int = PRIORITY_JOBS, timeout: float = None) -> float:
+        """
+        Block until `cost` tokens can be spent without dipping into the reserve kept for
+        higher priorities. Returns the seconds waited; raises TimeoutError past `timeout`.
+        """
+        floor = RESERVE.get(priority, 0.0) * self.capacity
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                self._refill()
+                if time.monotonic() >= self._paused_until and self._tokens - cost >= floor:
+                    self._tokens -= cost
+                    break
+                wait = max(self._paused_until - time.monotonic(), (cost + floor - self._tokens) / self.rate, 0.01)
+                if timeout is not None:
+                    left = timeout - (time.monotonic() - started)
+                    if left <= 0:
+                        raise TimeoutError(f"{self.name} rate limit: no tokens within {timeout:.1f}s")
+                    wait = min(wait, left)
+                self._cond.wait(wait)
+
+        waited = time.monotonic() - started
+        metrics.set_gauge(f"ratelimit.{self.name}.tokens", round(self._tokens, 1))
+        if waited > 0.01:
+            metrics.inc(f"ratelimit.{self.name}.waits")
+        return waited
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for `seconds` and drain the bucket (after a 429)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._cond.notify_all()
+
+    def available(self) -> float:
+        with self._cond:
+            self._refill()
+            return self._tokens
+
+
+# Sheets allows 60 read and 60 write requests per minute per user, and every process on the Pi uses the
+# same service account. Buckets and priorities are per process, so each entry point calls configure()
+# with its role and gets a fixed share; the shares below add up to no more than the quota.
+SHEETS_SHARES = {  # role -> (reads, writes) per minute
+    "monitor": (30, 35),
+    "kiosk": (20, 5),
+    "backfill": (5, 10),
+}
+
+# Gmail: 250 quota units per second per user, used only by the mail service
+BUCKETS = {
+    "gmail": TokenBucket("gmail", rate=200, capacity=200),
+}
+
+# Gmail quota units per method
+GMAIL_COST = {"watch": 100, "history.list": 2, "messages.get": 5}
+
+
+def configure(role: str):
+    """Size this process's Sheets buckets to its SHEETS_SHARES entry. Call once, before any Sheets request."""
+    reads, writes = SHEETS_SHARES[role]
+    BUCKETS["sheets_read"] = TokenBucket("sheets_read", rate=reads / 60, capacity=max(reads // 2, 2))
+    BUCKETS["sheets_write"] = TokenBucket("sheets_write", rate=writes / 60, capacity=max(writes // 2, 2))
+
+
+configure("monitor")  # default for tools that don't pick a role
+
+
+def is_rate_limited(e: Exception) -> bool:
+    """True for 429 / RESOURCE_EXHAUSTED from gspread (APIError) or googleapiclient (HttpError)."""
+    status = getattr(e, "code", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    if status is None:
+        status = getattr(getattr(e, "resp", None), "status", None)
+    return str(status) == "429" or "RESOURCE_EXHAUSTED" in str(e)
+
+
+def call(api: str, fn, *args, priority: int = PRIORITY_JOBS, cost: float = 1, timeout: float = None, **kwargs):
+    """
+    Run fn(*args, **kwargs) against the `api` bucket, retrying 429s with exponential backoff and jitter.
+    """
+    bucket = BUCKETS[api]
+    backoff = BACKOFF_INITIAL
+    for attempt in range(MAX_RETRIES + 1):
+        bucket.acquire(cost, priority, timeout)
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if not is_rate_limited(e) or attempt == MAX_RETRIES:
+                raise
+            delay = min(BACKOFF_MAX, backoff) * random.uniform(1.0, 1.5)
+            metrics.inc(f"ratelimit.{api}.throttled")
+            print(f"[RateLimit] {api} returned 429, backing off {delay:.1f}s (attempt {attempt + 1})")
+            bucket.pause(delay)
+            backoff *= 2
@@ -0,0 +1,148 @@
+import json
+import os
+import subprocess
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List
+import controller as cntrl
+import parser as pr
+
+STATS_PATH = "recovery_stats.json"
+
+# Seconds to let each tier settle before its success check runs
+RENAVIGATE_SETTLE = 2
+APP_RESTART_SETTLE = 20
+ADB_RECONNECT_SETTLE = 5
+WAYDROID_RESTART_SETTLE = 60
+
+
+@dataclass
+class TierStats:
+    attempts: int = 0
+    successes: int = 0
+    total_seconds: float = 0.0
+    last_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.attempts if self.attempts else 0.0
+
+
+@dataclass
+class RecoveryTier:
+    name: str
+    action: Callable[[], None]
+    check: Callable[[], bool]
+    settle: float
+
+
+def app_busy():
+    """
+    Return True if the app is showing its "Wait" spinner.
+    """
+    return bool(cntrl.find_by_desc_including("Wait"))
+
+
+def wait_for_app(max_checks: int = 10, interval: float = 5):
+    """
+    Poll until the "Wait" spinner clears. Returns False if it never does.
+    """
+    for _ in range(max_checks):
+        if not app_busy():
+            return True
+        time.sleep(interval)
+    return False
+
+
+def history_listed():
+    """
+    Success check: the app is responsive and the current screen lists Printing History jobs.
+    """
+    return not app_busy() and len(pr.parse_screen()) > 0
+
+
+def history_visible():
+    cntrl.go_to_printing_history()
+    return history_listed()
+
+
+def adb_and_history():
+    return cntrl.adb_connected() and history_visible()
+
+
+def reboot_host():
+    subprocess.run(["sudo", "reboot"])
+
+
+class RecoveryEngine:
+    """
+    Escalating recovery: each tier is tried in order and the first one whose check passes wins.
+    The host reboot is the last resort and is never followed by a check.
+    """
+
+    def __init__(self, stats_path: str = STATS_PATH):
+        self.stats_path = stats_path
+        self.tiers: List[RecoveryTier] = [
+            RecoveryTier("renavigate", cntrl.go_to_printing_history, history_listed, RENAVIGATE_SETTLE),
+            RecoveryTier("restart_app", cntrl.restart_app, history_visible, APP_RESTART_SETTLE),
+            RecoveryTier("reconnect_adb", cntrl.reconnect_adb, adb_and_history, ADB_RECONNECT_SETTLE),
+            RecoveryTier("restart_waydroid", cntrl.restart_waydroid, adb_and_history, WAYDROID_RESTART_SETTLE),
+        ]
+        self.stats: Dict[str, TierStats] = self._load_stats()
+
+    def recover(self, start_tier: int = 0):
+        """
+        Escalate through the tiers starting at `start_tier`. Returns the name of the tier that recovered.
+        """
+        started = time.monotonic()
+        for tier in self.tiers[start_tier:]:
+            print(f"[Recovery] Trying {tier.name}...")
+            t0 = time.monotonic()
+            try:
+                tier.action()
+                time.sleep(tier.settle)
+                ok = tier.check()
+            except Exception as e:
+                print(f"[Recovery] {tier.name} raised: {e}")
+                ok = False
+            self._record(tier.name, ok, time.monotonic() - t0)
+
+            if ok:
+                print(f"[Recovery] Recovered via {tier.name} in {time.monotonic() - started:.1f}s")
+                return tier.name
+
+        print("[Recovery] All tiers failed, rebooting host")
+        self._record("reboot", False, time.monotonic() - started)
+        reboot_host()
+        return "reboot"
+
+    def _record(self, name: str, ok: bool, seconds: float):
+        stats = self.stats.setdefault(name, TierStats())
+        stats.attempts += 1
+        stats.successes += int(ok)
+        stats.total_seconds += seconds
+        stats.last_seconds = seconds
+        self._save_stats()
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{name}: {s.successes}/{s.attempts} ok, avg {s.mean_seconds:.1f}s"
+            for name, s in self.stats.items()
+        )
+
+    def _load_stats(self) -> Dict[str, TierStats]:
+        if not os.path.exists(self.stats_path):
+            return {}
+        try:
+            with open(self.stats_path) as f:
+                return {name: TierStats(**s) for name, s in json.load(f).items()}
+        except Exception as e:
+            print(f"[Recovery] Could not read {self.stats_path}: {e}")
+            return {}
+
+    def _save_stats(self):
+        try:
+            with open(self.stats_path, "w") as f:
+                json.dump({name: asdict(s) for name, s in self.stats.items()}, f, indent=2)
+        except Exception as e:
+            print(f"[Recovery] Could not write {self.stats_path}: {e}")
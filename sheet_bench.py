@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark job-sync strategies against a local SQLite stand-in for Google Sheets.
+
+    python sheet_bench.py --rows 100000 --jobs 12 --latency 0.05
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+import gspread_updater as gu
+import rate_limit as rl
+from gspread_updater import SheetClient, SheetSession
+from job_store import PrintJob
+from local_sheets import LocalSpreadsheet
+
+WORKSHEET = "Raw Data"
+
+
+def build_sheet(rows: int, latency: float, error_rate: float) -> LocalSpreadsheet:
+    spreadsheet = LocalSpreadsheet(latency=0.0)
+    ws = spreadsheet.add_worksheet(WORKSHEET, rows=rows, cols=8)
+    start = datetime(2020, 1, 1)
+    chunk = []
+    for i in range(rows):
+        date = start + timedelta(minutes=30 * i)
+        chunk.append([f"job-{i}", "Success", date.strftime(gu.DATE_FORMAT), 1.5, "Savage", 12.0, "PLA", ""])
+        if len(chunk) == 5000:
+            ws.append_rows(chunk)
+            chunk = []
+    if chunk:
+        ws.append_rows(chunk)
+    # Simulated network conditions apply to the benchmark, not the setup
+    spreadsheet.latency = latency
+    spreadsheet.error_rate = error_rate
+    spreadsheet.calls = {"read": 0, "write": 0}
+    return spreadsheet
+
+
+def make_jobs(rows: int, count: int):
+    """Half updates to recent existing rows, half brand-new jobs."""
+    start = datetime(2020, 1, 1)
+    jobs = []
+    for n in range(count):
+        if n % 2 == 0:
+            i = rows - 1 - random.randrange(min(rows, 50))
+            jobs.append(PrintJob(f"job-{i}", "Failed", start + timedelta(minutes=30 * i), 1.5, "Savage", 12.0, ["PLA"], "E"))
+        else:
+            jobs.append(PrintJob(f"new-{n}", "Printing", datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=n),
+                                 0.5, "Byron", 3.0, ["PETG"], ""))
+    return jobs
+
+
+def legacy_update(ws, job):
+    """The original find_job_row/update_job: download and parse the whole sheet per write."""
+    all_values = ws.get_all_values()
+    found = len(all_values) + 1, ""
+    for i, row in enumerate(all_values, start=1):
+        try:
+            if row[0].strip() == job.name and datetime.strptime(row[2].strip(), gu.DATE_FORMAT) == job.date:
+                found = i, row
+                break
+        except Exception:
+            continue
+    i, row = found
+    ws.update(f"A{i}:H{i}", [SheetClient.map_job_to_row(None, job, row)])
+
+
+def run(strategy: str, args):
+    spreadsheet = build_sheet(args.rows, args.latency, args.error_rate)
+    gu.set_session(SheetSession(spreadsheet=spreadsheet))
+    jobs = make_jobs(args.rows, args.jobs)
+    client = SheetClient(WORKSHEET)
+
+    t0 = time.perf_counter()
+    for cycle in range(args.cycles):
+        if strategy == "legacy":
+            ws = spreadsheet.worksheet(WORKSHEET)
+            for job in jobs:
+                legacy_update(ws, job)
+        elif strategy == "indexed":
+            for job in jobs:
+                client.update_job(job)
+        elif strategy == "batched":
+            with client.batch():
+                for job in jobs:
+                    client.update_job(job)
+        # Jobs progress between cycles so later cycles still have real changes
+        for job in jobs[::3]:
+            job.duration += 0.1
+    elapsed = time.perf_counter() - t0
+
+    print(f"{strategy:>8}: {elapsed:8.2f}s  reads={spreadsheet.calls['read']:<5} writes={spreadsheet.calls['write']:<5}"
+          f" ({args.cycles} cycles x {args.jobs} jobs over {args.rows} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--jobs", type=int, default=12, help="jobs touched per cycle")
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per API call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="chance of a simulated 429 per call")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the production token buckets")
+    parser.add_argument("--strategies", default="legacy,indexed,batched")
+    args = parser.parse_args()
+
+    if not args.rate_limit:
+        for name in ("sheets_read", "sheets_write"):
+            rl.BUCKETS[name] = rl.TokenBucket(name, rate=1e9, capacity=1e9)
+    rl.BACKOFF_INITIAL = 0.1
+
+    for strategy in args.strategies.split(","):
+        run(strategy, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+import metrics
+from job_store import PrintJob
+
+SPOOL_PATH = "sheet_spool.db"
+DRAIN_INTERVAL = 60      # seconds between drains when nobody calls flush()
+DRAIN_BATCH = 200        # rows per batch sent to Sheets
+BACKOFF_INITIAL = 5
+BACKOFF_MAX = 600
+
+
+class SheetSpool:
+    """
+    Durable write-behind queue in front of a SheetClient.
+    Job upserts land in a local SQLite file and a background worker drains them to Sheets,
+    so a Google outage only grows the spool instead of interrupting the monitor.
+    Pending writes are keyed by (name, date): a newer write for the same row replaces the older one,
+    and rows drain in the order they were last written.
+    """
+
+    def __init__(self, sheet_client, path: str = SPOOL_PATH):
+        self.sheet_client = sheet_client
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pending (key TEXT PRIMARY KEY, seq INTEGER NOT NULL, job TEXT NOT NULL)"
+        )
+        self._db.commit()
+        self._seq = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM pending").fetchone()[0]
+        self._wake = threading.Event()
+        metrics.set_gauge("sheets.spool_depth", self.depth())
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def update_job(self, job: PrintJob):
+        """Spool an upsert of the job's row. Returns immediately."""
+        key = json.dumps([job.name, job.date.isoformat()])
+        with self._lock:
+            self._seq += 1
+            self._db.execute(
+                "INSERT INTO pending (key, seq, job) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET seq = excluded.seq, job = excluded.job",
+                (key, self._seq, json.dumps(job.to_dict())),
+            )
+            self._db.commit()
+        metrics.set_gauge("sheets.spool_depth", self.depth())
+
+    def flush(self):
+        """Ask the worker to drain now (unless it is backing off)."""
+        self._wake.set()
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def _worker(self):
+        backoff = 0.0
+        while True:
+            if backoff:
+                # flush() doesn't cut a backoff short; jitter keeps restarts from retrying in lockstep
+                time.sleep(backoff * random.uniform(0.8, 1.2))
+            else:
+                self._wake.wait(timeout=DRAIN_INTERVAL)
+            self._wake.clear()
+
+            try:
+                while self._drain_batch():
+                    pass
+                backoff = 0.0
+            except Exception as e:
+                backoff = min(BACKOFF_MAX, max(BACKOFF_INITIAL, backoff * 2))
+                metrics.inc("sheets.spool_failures")
+                print(f"[SheetSpool] Drain failed ({e}); {self.depth()} rows pending, retrying in ~{backoff:.0f}s")
+            metrics.set_gauge("sheets.spool_depth", self.depth())
+
+    def _drain_batch(self) -> bool:
+        """Send the oldest DRAIN_BATCH rows in one batch. Returns True if any were sent."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, seq, job FROM pending ORDER BY seq LIMIT ?", (DRAIN_BATCH,)
+            ).fetchall()
+        if not rows:
+            return False
+
+        with self.sheet_client.batch():
+            for _, _, job in rows:
+                self.sheet_client.update_job(PrintJob.from_dict(json.loads(job)))
+
+        with self._lock:
+            # Only drop rows that weren't rewritten while the batch was in flight
+            self._db.executemany("DELETE FROM pending WHERE key = ? AND seq = ?", [(k, s) for k, s, _ in rows])
+            self._db.commit()
+        metrics.inc("sheets.spool_drained", len(rows))
+        return True
@@ -0,0 +1,50 @@
+import json
+import os
+import socket
+import threading
+import time
+
+SOCKET_PATH = "/tmp/bambu_status.sock"
+MAX_DATAGRAM = 64 * 1024
+
+
+class StatusPublisher:
+    """
+    Sends printer snapshots to the kiosk over a local Unix datagram socket.
+    Fire-and-forget: if no UI is listening the snapshot is simply dropped.
+    """
+
+    def __init__(self, path: str = SOCKET_PATH):
+        self.path = path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def publish(self, snapshot: dict):
+        try:
+            self._sock.sendto(json.dumps(snapshot).encode(), self.path)
+        except (FileNotFoundError, ConnectionRefusedError, BlockingIOError):
+            pass
+        except OSError as e:
+            print(f"[StatusChannel] Publish failed: {e}")
+
+
+def subscribe(callback, path: str = SOCKET_PATH):
+    """
+    Bind the channel and call callback(snapshot) from a background thread for every snapshot received.
+    """
+    if os.path.exists(path):
+        os.remove(path)  # stale socket from a previous run
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(path)
+
+    def loop():
+        while True:
+            try:
+                data = sock.recv(MAX_DATAGRAM)
+                callback(json.loads(data))
+            except Exception as e:
+                print(f"[StatusChannel] Bad snapshot: {e}")
+                time.sleep(0.1)
+
+    threading.Thread(target=loop, daemon=True).start()
+    print(f"[StatusChannel] Subscribed on {path}")
@@ -0,0 +1,98 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, List
+from job_store import PrintJob
+
+STATS_PATH = "usage_stats.db"
+SUMMARY_DAYS = 14  # per-printer daily rows published to the summary worksheet
+
+
+class UsageStats:
+    """
+    Usage-trend aggregates maintained incrementally as jobs finish:
+    hours, job counts and success/failure per printer per day, and grams per material.
+    Each job is counted once, keyed by (name, date), so feeding the same job again is a no-op.
+    """
+
+    def __init__(self, path: str = STATS_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS recorded (key TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS daily (
+                printer TEXT, day TEXT, hours REAL, jobs INTEGER, success INTEGER, failed INTEGER,
+                PRIMARY KEY (printer, day)
+            );
+            CREATE TABLE IF NOT EXISTS materials (material TEXT PRIMARY KEY, grams REAL, jobs INTEGER);
+        """)
+        self._db.commit()
+        self._recorded = {k for (k,) in self._db.execute("SELECT key FROM recorded")}
+
+    def record(self, job: PrintJob) -> bool:
+        """Fold a finished job into the aggregates. Returns False if it is unfinished or already counted."""
+        if job.status.strip().lower() == "printing":
+            return False
+        key = json.dumps([job.name, job.date.isoformat()])
+        if key in self._recorded:
+            return False
+
+        success = int(job.status.strip().lower() == "success")
+        # Weight is per job; split it evenly over the filaments it used
+        materials = job.materials or ["Unknown"]
+        grams = (job.weight or 0.0) / len(materials)
+        with self._lock:
+            # Another process (backfill.py) may have counted it since we loaded _recorded;
+            # the aggregates only move if this insert is the one that claimed the key
+            with self._db:
+                claimed = self._db.execute("INSERT OR IGNORE INTO recorded (key) VALUES (?)", (key,)).rowcount == 1
+                if claimed:
+                    self._db.execute(
+                        "INSERT INTO daily (printer, day, hours, jobs, success, failed) VALUES (?, ?, ?, 1, ?, ?) "
+                        "ON CONFLICT(printer, day) DO UPDATE SET hours = hours + excluded.hours, jobs = jobs + 1, "
+                        "success = success + excluded.success, failed = failed + excluded.failed",
+                        (job.machine, job.date.date().isoformat(), job.duration or 0.0, success, 1 - success),
+                    )
+                    for material in materials:
+                        self._db.execute(
+                            "INSERT INTO materials (material, grams, jobs) VALUES (?, ?, 1) "
+                            "ON CONFLICT(material) DO UPDATE SET grams = grams + excluded.grams, jobs = jobs + 1",
+                            (material.strip(), grams),
+                        )
+            self._recorded.add(key)
+        return claimed
+
+    def record_all(self, jobs: Iterable[PrintJob]) -> int:
+        return sum(self.record(job) for job in jobs)
+
+    def summary_rows(self, days: int = SUMMARY_DAYS) -> List[list]:
+        """
+        A compact table for the summary worksheet: the last `days` days per printer,
+        all-time totals per printer, then grams per material.
+        """
+        since = (datetime.now() - timedelta(days=days)).date().isoformat()
+        with self._lock:
+            daily = self._db.execute(
+                "SELECT day, printer, ROUND(hours, 1), jobs, success, failed FROM daily "
+                "WHERE day >= ? ORDER BY day DESC, printer", (since,)
+            ).fetchall()
+            totals = self._db.execute(
+                "SELECT printer, ROUND(SUM(hours), 1), SUM(jobs), SUM(success), SUM(failed) FROM daily "
+                "GROUP BY printer ORDER BY printer"
+            ).fetchall()
+            materials = self._db.execute(
+                "SELECT material, ROUND(grams, 1), jobs FROM materials ORDER BY grams DESC"
+            ).fetchall()
+
+        rows = [["Day", "Printer", "Hours", "Jobs", "Success", "Failed", "Success rate"]]
+        rows += [list(r) + [_rate(r[4], r[3])] for r in daily]
+        rows += [[], ["All time", "Printer", "Hours", "Jobs", "Success", "Failed", "Success rate"]]
+        rows += [[""] + list(r) + [_rate(r[3], r[2])] for r in totals]
+        rows += [[], ["Material", "Grams", "Jobs"]]
+        rows += [list(r) for r in materials]
+        return rows
+
+
+def _rate(success: int, jobs: int) -> float:
+    return round(success / jobs, 3) if jobs else 0.0